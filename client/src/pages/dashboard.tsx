@@ -1885,6 +1885,7 @@ export default function Dashboard({ user }: { user: User }) {
   const [removedProducts, setRemovedProducts] = useState<string[]>([]);
   const [pythonSource, setPythonSource] = useState<string | null>(null);
   const [costInfo, setCostInfo] = useState<any>(null);
+  const pngPollRef = useRef(0);  // bumped to cancel an in-flight PNG readiness poll
   
   // Editing state variables
   const [editMode, setEditMode] = useState(false);
@@ -1899,7 +1900,25 @@ export default function Dashboard({ user }: { user: User }) {
   
   useEffect(() => { loadIcons() }, []);
 
+  // Background PNG renders: poll png-status until the file is done, then show it
+  const waitForPng = useCallback(async (url: string) => {
+    const token = ++pngPollRef.current;
+    const filename = url.split("/").pop();
+    for (let i = 0; i < 60; i++) {
+      await new Promise(r => setTimeout(r, 1000));
+      if (pngPollRef.current !== token) return;
+      try {
+        const res = await fetch(`/api/diagrams/png-status/${filename}`, { credentials: "include" });
+        if (res.ok && (await res.json()).ready) {
+          if (pngPollRef.current === token) setPngUrl(url);
+          return;
+        }
+      } catch { /* transient — keep polling */ }
+    }
+  }, []);
+
   const loadTemplate = useCallback(async (templateId: string) => {
+    pngPollRef.current++;
     setLoading(true); setError(""); setDiag(null); setPngUrl(null); setPopover(null); setSource(null); setTab("diagram");
     try {
       const res = await fetch(`/api/templates/${templateId}`, { credentials: "include" });
@@ -1913,6 +1932,7 @@ export default function Dashboard({ user }: { user: User }) {
   const generate = useCallback(async (directPrompt?: string) => {
     const p = directPrompt || prompt;
     if (!p.trim()) return;
+    pngPollRef.current++;
     setLoading(true); setError(""); setDiag(null); setPngUrl(null); setPopover(null); setSource(null);
     setDecisions([]); setAntiPatterns([]); setKeptProducts([]); setRemovedProducts([]); setPythonSource(null); setCostInfo(null);
     setTab("diagram");
@@ -1924,7 +1944,8 @@ export default function Dashboard({ user }: { user: User }) {
       if (data.source === "mingrammer") {
         // Mingrammer engine — editable diagram JSON + PNG reference
         setDiag(safeDiagram(data.diagram));
-        setPngUrl(data.png_url);
+        if (data.png_pending) waitForPng(data.png_url);
+        else setPngUrl(data.png_url);
         setDecisions(data.decisions || []);
         setAntiPatterns(data.anti_patterns || []);
         setKeptProducts(data.kept || []);
@@ -1943,7 +1964,7 @@ export default function Dashboard({ user }: { user: User }) {
         setCostInfo(data.cost);
       }
     } catch (e: any) { setError(e.message) } setLoading(false);
-  }, [prompt]);
+  }, [prompt, waitForPng]);
 
   // Save diagram state to history for undo/redo
   const saveToHistory = useCallback((diagram: Diagram) => {
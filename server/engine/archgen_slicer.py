@@ -17,12 +17,22 @@
 """
 
 import ast
+import functools
+import hashlib
 import re
 import os
 import subprocess
 import sys
+import threading
+from collections import OrderedDict
 from pathlib import Path
-from typing import Set, Optional
+from types import CodeType
+from typing import Dict, Set, Tuple, Optional
+
+try:
+    import pygraphviz  # libgvc in-process: no `dot` fork per render
+except ImportError:
+    pygraphviz = None
 
 
 class DiagramSlicer(ast.NodeTransformer):
@@ -49,8 +59,9 @@ class DiagramSlicer(ast.NodeTransformer):
         if len(node.targets) == 1 and isinstance(node.targets[0], ast.Name):
             var_name = node.targets[0].id
 
-            # Always keep style dicts
-            if var_name in self.always_keep:
+            # Always keep style dicts and other UPPERCASE module constants
+            # (e.g. MappingProxyType styles, EF_* edge factories)
+            if var_name in self.always_keep or var_name.isupper():
                 return node
 
             # If it's a Call (node instantiation like BigQuery("..."))
@@ -78,6 +89,20 @@ class DiagramSlicer(ast.NodeTransformer):
             return None
         return node
 
+    def prune_edge_table(self, tree):
+        """Drop _EDGES rows whose endpoints were removed (run after visit)."""
+        for node in ast.walk(tree):
+            if (isinstance(node, ast.Assign) and len(node.targets) == 1
+                    and isinstance(node.targets[0], ast.Name)
+                    and node.targets[0].id == "_EDGES"
+                    and isinstance(node.value, ast.List)):
+                node.value.elts = [
+                    row for row in node.value.elts
+                    if not any(isinstance(c, ast.Constant) and c.value in self.removed_vars
+                               for c in getattr(row, "elts", ())[:2])
+                ]
+        return tree
+
     def visit_With(self, node):
         """Process Cluster/Diagram blocks — remove empty clusters."""
         # Recurse into body first
@@ -110,37 +135,151 @@ class DiagramSlicer(ast.NodeTransformer):
         return node
 
 
+# Above this many kept products dot's layered layout gets slow; the
+# force-directed sfdp engine scales far better at the cost of some crossings.
+SFDP_THRESHOLD = 40
+
+LAYOUT_ATTRS = {
+    "dot":  '"layout": "dot"',
+    "sfdp": '"layout": "sfdp", "overlap": "prism", "sep": "+8", "splines": "true"',
+}
+
+
+# Previews rasterize at 96 dpi (ARCHGEN_DPI overrides); hi-res renders are
+# opt-in per request. The slicer pins the value into the sliced source.
+DPI_ATTR = '"dpi": os.environ.get("ARCHGEN_DPI", "96")'
+DEFAULT_DPI = os.environ.get("ARCHGEN_DPI", "96")
+HI_RES_DPI = "150"
+
+
+def choose_layout(keep_count: int) -> str:
+    """Graphviz engine for a slice of this size."""
+    return "dot" if keep_count < SFDP_THRESHOLD else "sfdp"
+
+
+# Sliced sources (filename left as the placeholder) + removed vars, LRU by
+# (master, keep set, title, layout, dpi). Many prompts collapse to the same slice.
+_SLICE_CACHE: "OrderedDict[tuple, Tuple[str, frozenset]]" = OrderedDict()
+_SLICE_CACHE_MAX = 256
+
+
 def slice_blueprint(
     master_source: str,
     keep_products: Set[str],
     diagram_title: str,
     output_filename: str,
+    layout: str = "dot",
+    dpi: str = DEFAULT_DPI,
 ) -> str:
     """
     Parse a mingrammer master blueprint, keep only the specified
     product IDs, and return a valid sliced Python source string.
     """
+    key = (hash(master_source), frozenset(keep_products), diagram_title, layout, dpi)
+    cached = _SLICE_CACHE.get(key)
+    if cached is not None:
+        _SLICE_CACHE.move_to_end(key)
+    else:
+        # Swap the Graphviz layout engine
+        source = master_source.replace(LAYOUT_ATTRS["dot"], LAYOUT_ATTRS[layout], 1)
+        source = source.replace(DPI_ATTR, f'"dpi": "{dpi}"', 1)
+
+        # Replace diagram title
+        source = source.replace(
+            "GCP Data Platform — Master Blueprint",
+            diagram_title
+        )
+
+        # Parse to AST
+        tree = ast.parse(source)
+
+        # Slice
+        slicer = DiagramSlicer(keep_products)
+        new_tree = slicer.prune_edge_table(slicer.visit(tree))
+        ast.fix_missing_locations(new_tree)
+
+        # Unparse
+        cached = (ast.unparse(new_tree), frozenset(slicer.removed_vars))
+        _SLICE_CACHE[key] = cached
+        if len(_SLICE_CACHE) > _SLICE_CACHE_MAX:
+            _SLICE_CACHE.popitem(last=False)
+
     # Replace placeholder filename
-    source = master_source.replace("FILENAME_PLACEHOLDER", output_filename)
+    sliced, removed = cached
+    return sliced.replace("FILENAME_PLACEHOLDER", output_filename), set(removed)
+
+
+# Compiled sliced scripts, keyed by a digest of their source with the output
+# filename lifted out into a global, so the same slice rendered to another
+# path reuses the code. PNG jobs compile from threads.
+_CODE_CACHE: "OrderedDict[bytes, CodeType]" = OrderedDict()
+_CODE_CACHE_MAX = 256
+_CODE_CACHE_LOCK = threading.Lock()
+_FILENAME_GLOBAL = "__archgen_output__"
+
+# Diagram.render is patched class-wide while a slice executes in-process
+_RENDER_LOCK = threading.Lock()
+
+
+def _compiled(sliced_source: str, output_path: str, script: Path) -> CodeType:
+    """Code for a sliced script; it reads its output filename from _FILENAME_GLOBAL."""
+    # ast.unparse writes the filename as a repr()-style literal
+    template = sliced_source.replace(f"filename={output_path!r}", f"filename={_FILENAME_GLOBAL}", 1)
+    key = hashlib.blake2b(template.encode(), digest_size=16).digest()
+    with _CODE_CACHE_LOCK:
+        code = _CODE_CACHE.get(key)
+        if code is not None:
+            _CODE_CACHE.move_to_end(key)
+            return code
+    code = compile(template, str(script), "exec", optimize=2)
+    with _CODE_CACHE_LOCK:
+        _CODE_CACHE[key] = code
+        if len(_CODE_CACHE) > _CODE_CACHE_MAX:
+            _CODE_CACHE.popitem(last=False)
+    return code
+
+
+def _exec_slice(code: CodeType, output_path: str):
+    # The script prints a success banner. A module-level print that writes to
+    # stderr keeps stdout clean for JSON without swapping the process-wide
+    # sys.stdout under the NDJSON writer.
+    exec(code, {
+        "__name__": "__main__",
+        _FILENAME_GLOBAL: output_path,
+        "print": functools.partial(print, file=sys.stderr),
+    })
+
+
+def _render_in_process(sliced_source: str, output_path: str, script: Path):
+    """
+    Run the sliced script in this interpreter. With pygraphviz, mingrammer's
+    `dot` shell-out is replaced by a DOT capture that libgvc lays out and
+    draws directly; without it, mingrammer renders as usual.
+    """
+    code = _compiled(sliced_source, output_path, script)
+    if pygraphviz is None:
+        _exec_slice(code, output_path)
+        return
 
-    # Replace diagram title
-    source = source.replace(
-        "GCP Data Platform — Master Blueprint",
-        diagram_title
-    )
+    from diagrams import Diagram
 
-    # Parse to AST
-    tree = ast.parse(source)
+    captured = []
 
-    # Slice
-    slicer = DiagramSlicer(keep_products)
-    new_tree = slicer.visit(tree)
-    ast.fix_missing_locations(new_tree)
+    def _capture_dot(self):
+        captured.append(self.dot.source)
+        self.dot.save()  # Diagram.__exit__ removes this file
 
-    # Unparse
-    sliced = ast.unparse(new_tree)
+    with _RENDER_LOCK:
+        original = Diagram.render
+        Diagram.render = _capture_dot
+        try:
+            _exec_slice(code, output_path)
+        finally:
+            Diagram.render = original
 
-    return sliced, slicer.removed_vars
+    graph = pygraphviz.AGraph(string=captured[-1])
+    graph.layout(prog=graph.graph_attr.get("layout") or "dot")
+    graph.draw(f"{output_path}.png", format="png")
 
 
 def render_sliced(sliced_source: str, output_path: str) -> str:
@@ -148,6 +287,14 @@ def render_sliced(sliced_source: str, output_path: str) -> str:
     # Write to temp file
     tmp = Path(output_path).with_suffix(".py")
     tmp.write_text(sliced_source)
+    png_path = f"{output_path}.png"
+
+    try:
+        _render_in_process(sliced_source, output_path, tmp)
+        if os.path.exists(png_path):
+            return png_path
+    except Exception as e:
+        print(f"⚠️ In-process render failed ({e}), using subprocess", file=sys.stderr)
 
     # Execute
     result = subprocess.run(
@@ -157,7 +304,6 @@ def render_sliced(sliced_source: str, output_path: str) -> str:
     if result.returncode != 0:
         raise RuntimeError(f"Render failed:\n{result.stderr}")
 
-    png_path = f"{output_path}.png"
     if not os.path.exists(png_path):
         raise FileNotFoundError(f"Expected PNG not found: {png_path}")
 
@@ -442,6 +588,11 @@ def decide_products(prompt: str) -> dict:
 # MAIN — End-to-end: prompt → decisions → slice → PNG
 # ═══════════════════════════════════════════════════════════
 
+@functools.lru_cache(maxsize=4)
+def _read_master(master_path: str) -> str:
+    return Path(master_path).read_text()
+
+
 def generate_architecture(
     prompt: str,
     master_path: str = "gcp_master_blueprint.py",
@@ -458,7 +609,7 @@ def generate_architecture(
     result = decide_products(prompt)
 
     # Step 2: Load master
-    master_source = Path(master_path).read_text()
+    master_source = _read_master(master_path)
 
     # Step 3: Slice
     output_name = os.path.join(output_dir, "sliced_architecture")
@@ -467,6 +618,7 @@ def generate_architecture(
         result["keep_set"],
         result["title"],
         output_name,
+        layout=choose_layout(len(result["keep_set"])),
     )
 
     # Step 4: Render
@@ -664,35 +664,84 @@ PIPELINE_ZONES = {"ingestion", "landing", "processing", "medallion"}
 # BUILD DIAGRAM
 # ═══════════════════════════════════════════════════════════
 
+# Map our zone names → canvas-compatible zones
+CANVAS_ZONE_MAP: Dict[str, str] = {
+    "source":       "sources",
+    "ext-identity": "sources",
+    "gcp-security": "cloud",
+    "ingestion":    "cloud",
+    "landing":      "cloud",
+    "processing":   "cloud",
+    "medallion":    "cloud",
+    "serving":      "cloud",
+    "orchestration":"cloud",
+    "gcp-obs":      "cloud",
+    "governance":   "cloud",
+    "consumer":     "consumers",
+    "ext-alert":    "external",     # separate — not in cloud or consumers
+    "ext-log":      "external",     # separate — not in cloud or consumers
+}
+
+# Position-independent part of each node dict, built once per product.
+# Filled lazily because _resolve_keep_set() adds blueprint products on demand.
+_NODE_TEMPLATES: Dict[str, Dict[str, Any]] = {}
+
+
+def _node_template(pid: str, prod: dict) -> Dict[str, Any]:
+    tmpl = _NODE_TEMPLATES.get(pid)
+    if tmpl is None:
+        tmpl = _NODE_TEMPLATES[pid] = {
+            "id": pid,
+            "name": prod["name"],
+            "icon": prod["icon"],
+            "subtitle": prod["subtitle"],
+            "zone": CANVAS_ZONE_MAP.get(prod["zone"], "cloud"),  # backward-compatible
+            "subZone": prod["zone"],                              # our new zone system
+            "x": 0,
+            "y": 0,
+        }
+    return tmpl
+
+
 def _make_node(pid: str, prod: dict, x: int, y: int) -> dict:
-    # Map our zone names → canvas-compatible zones
-    ZONE_MAP = {
-        "source":       "sources",
-        "ext-identity": "sources",
-        "gcp-security": "cloud",
-        "ingestion":    "cloud",
-        "landing":      "cloud",
-        "processing":   "cloud",
-        "medallion":    "cloud",
-        "serving":      "cloud",
-        "orchestration":"cloud",
-        "gcp-obs":      "cloud",
-        "governance":   "cloud",
-        "consumer":     "consumers",
-        "ext-alert":    "external",     # separate — not in cloud or consumers
-        "ext-log":      "external",     # separate — not in cloud or consumers
-    }
-    return {
-        "id": pid,
-        "name": prod["name"],
-        "icon": prod["icon"],
-        "subtitle": prod["subtitle"],
-        "zone": ZONE_MAP.get(prod["zone"], "cloud"),  # backward-compatible
-        "subZone": prod["zone"],                       # our new zone system
-        "x": x,
-        "y": y,
-        "details": {"notes": "Selected by knowledge engine"},
-    }
+    node = dict(_node_template(pid, prod))
+    node["x"] = x
+    node["y"] = y
+    node["details"] = {"notes": "Selected by knowledge engine"}
+    return node
+
+
+# EDGE_RULES flattened once into (from, to, edge-fields) rows in rule order.
+# A pair only ever takes its first rule, so duplicates are dropped here and a
+# request just keeps the rows whose endpoints are both on the canvas.
+def _flatten_edge_rules() -> List[tuple]:
+    rows = []
+    seen = set()
+    for rule in EDGE_RULES:
+        to_id = rule["to"]
+        to_zone = PRODUCTS.get(to_id, {}).get("zone", "")
+        for fid in rule["from_any"]:
+            if (fid, to_id) in seen:
+                continue
+            seen.add((fid, to_id))
+            fields: Dict[str, Any] = {
+                "from": fid,
+                "to": to_id,
+                "label": rule.get("label", ""),
+                "edgeType": rule.get("edgeType", "data"),
+            }
+            # Boundary crossing
+            from_zone = PRODUCTS.get(fid, {}).get("zone", "")
+            if (from_zone == "source" and to_zone in GCP_ZONES) or to_zone == "consumer":
+                fields["crossesBoundary"] = True
+            # Security metadata
+            if "security" in rule:
+                fields["security"] = rule["security"]
+            rows.append((fid, to_id, fields))
+    return rows
+
+
+_EDGE_ROWS = _flatten_edge_rules()
 
 
 def _place_in_zone(pids: list, zx: int, zy: int, zw: int,
@@ -1052,41 +1101,11 @@ def build_diagram(keep_set: Set[str], title: str,
     # ══════════════════════════════════════════════
     node_ids = {n["id"] for n in nodes}
     edge_id = 0
-    seen_pairs: set = set()
 
-    for rule in EDGE_RULES:
-        to_id = rule["to"]
-        if to_id not in node_ids:
-            continue
-        from_ids = [fid for fid in rule["from_any"] if fid in node_ids]
-        for fid in from_ids:
-            pair = (fid, to_id)
-            if pair in seen_pairs:
-                continue
-            seen_pairs.add(pair)
+    for fid, to_id, fields in _EDGE_ROWS:
+        if to_id in node_ids and fid in node_ids:
             edge_id += 1
-
-            edge: Dict[str, Any] = {
-                "id": f"e{edge_id}",
-                "from": fid,
-                "to": to_id,
-                "label": rule.get("label", ""),
-                "edgeType": rule.get("edgeType", "data"),
-            }
-
-            # Boundary crossing
-            from_zone = PRODUCTS.get(fid, {}).get("zone", "")
-            to_zone = PRODUCTS.get(to_id, {}).get("zone", "")
-            if from_zone == "source" and to_zone in GCP_ZONES:
-                edge["crossesBoundary"] = True
-            if to_zone == "consumer":
-                edge["crossesBoundary"] = True
-
-            # Security metadata
-            if "security" in rule:
-                edge["security"] = rule["security"]
-
-            edges.append(edge)
+            edges.append({"id": f"e{edge_id}", **fields})
 
     # ══════════════════════════════════════════════
     # PHASES — named to match canvas layer band renderer
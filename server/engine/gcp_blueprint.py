@@ -16,8 +16,15 @@ Usage:
   edges = get_edges_for(keep)
 """
 
+import re
+import sys
 from typing import Dict, List, Any, Set, Tuple, Optional
 
+try:
+    import ahocorasick  # pyahocorasick: C automaton, optional
+except ImportError:
+    ahocorasick = None
+
 
 # ═══════════════════════════════════════════════════════════
 # SOURCE CATEGORIES — L1 sub-grouping for canvas layout
@@ -78,6 +85,9 @@ SOURCE_KEYWORDS: Dict[str, List[str]] = {
     "src_netsuite": ["netsuite"], "src_shopify": ["shopify"], "src_stripe": ["stripe"],
 }
 
+# Fixed traversal orders for the per-prompt loops (tuples, not dict views)
+_SOURCE_TYPE_ITEMS = tuple(SOURCE_TYPES.items())
+
 
 # ═══════════════════════════════════════════════════════════
 # NODES — every product · layer + group on each
@@ -417,7 +427,7 @@ def get_layer(node_id: str) -> str:
     return "?"
 
 def get_source_type(src_id: str) -> str:
-    for stype, ids in SOURCE_TYPES.items():
+    for stype, ids in _SOURCE_TYPE_ITEMS:
         if src_id in ids: return stype
     return "saas"
 
@@ -438,7 +448,9 @@ def get_edges_for(keep_set: Set[str]) -> List[Dict]:
     return [e for e in EDGES if e["from"] in keep_set and e["to"] in keep_set]
 
 def auto_wire(source_ids: Set[str]) -> Tuple[Set[str], List[str]]:
+    """Source IDs → (keep_set, decisions). keep_set already contains source_ids."""
     extra = set(ALWAYS_ON)
+    extra.update(source_ids)
     decisions = []
     has_onprem = any(s in SOURCE_TYPES["onprem"] for s in source_ids)
     has_cross  = any(s in SOURCE_TYPES["cross_cloud"] for s in source_ids)
@@ -469,15 +481,8 @@ def auto_wire(source_ids: Set[str]) -> Tuple[Set[str], List[str]]:
     return extra, decisions
 
 def parse_prompt(prompt: str) -> Set[str]:
-    """Parse user prompt → set of source IDs using SOURCE_KEYWORDS."""
-    p = prompt.lower()
-    sources = set()
-    for src_id, keywords in SOURCE_KEYWORDS.items():
-        for kw in keywords:
-            if kw in p:
-                sources.add(src_id)
-                break
-    return sources
+    """Parse user prompt → set of source IDs using SOURCE_KEYWORDS (substring match)."""
+    return {src_id for _, src_id in SOURCE_KEYWORD_AUTOMATON.scan(prompt.lower())}
 
 
 def build_title(source_ids: Set[str]) -> str:
@@ -1313,27 +1318,219 @@ INDUSTRY_TAGS: Dict[str, dict] = {
     },
 }
 
+# Freeze the tag tables once: tuples for ordered fields, frozensets for fields
+# that are only ever queried for membership. Keywords are lower-cased and
+# interned so prompt matching never has to re-normalize them. Product ids are
+# interned too; ids arriving from the KB or Haiku are interned at the boundary
+# (kb_query) so set/dict probes against these tables compare by identity.
+def _norm_keywords(keywords) -> Tuple[str, ...]:
+    return tuple(sys.intern(k.lower()) for k in keywords)
+
+
+NODES = {sys.intern(k): v for k, v in NODES.items()}
+PRODUCT_TAGS = {sys.intern(k): v for k, v in PRODUCT_TAGS.items()}
+INDUSTRY_TAGS = {sys.intern(k): v for k, v in INDUSTRY_TAGS.items()}
+
+# Most products share the same industries ("all", "enterprise") and many share
+# use cases, so equal values are collapsed onto one shared immutable object.
+_SHARED: Dict[Any, Any] = {}
+
+for _tags in PRODUCT_TAGS.values():
+    _tags["keywords"] = _norm_keywords(_tags["keywords"])
+    _key = tuple(_tags["use_cases"])
+    _tags["use_cases"] = _SHARED.setdefault(_key, _key)
+    _key = frozenset(_tags["industries"])
+    _tags["industries"] = _SHARED.setdefault(_key, _key)
+for _pat in ARCHITECTURE_PATTERNS:
+    _pat["id"] = sys.intern(_pat["id"])
+    _pat["keywords"] = _norm_keywords(_pat["keywords"])
+    if "extra_products" in _pat:
+        _pat["extra_products"] = [sys.intern(p) for p in _pat["extra_products"]]
+for _ind in INDUSTRY_TAGS.values():
+    _ind["keywords"] = _norm_keywords(_ind["keywords"])
+    _ind["compliance"] = tuple(_ind["compliance"])
+    _ind["required_products"] = frozenset(map(sys.intern, _ind["required_products"]))
+
+# Pattern ids are unique; look patterns up by id instead of scanning the list
+PATTERN_BY_ID: Dict[str, dict] = {p["id"]: p for p in ARCHITECTURE_PATTERNS}
+
+
+class ProductRow:
+    """Flattened, read-only view of one product (NODES + PRODUCT_TAGS)."""
+
+    __slots__ = ("name", "subtitle", "description", "keywords", "use_cases",
+                 "industries", "search_text")
+
+    def __init__(self, product_id: str):
+        node = NODES.get(product_id, {})
+        tags = PRODUCT_TAGS.get(product_id, {})
+        self.name: str = node.get("name", "")
+        self.subtitle: str = node.get("subtitle", "")
+        self.description: str = tags.get("description", "")
+        self.keywords: Tuple[str, ...] = tags.get("keywords", ())
+        self.use_cases: Tuple[str, ...] = tags.get("use_cases", ())
+        self.industries: frozenset = tags.get("industries", frozenset())
+        # Rich text string for embedding from product tags + node info
+        parts = [
+            self.name,
+            self.subtitle,
+            self.description,
+            " ".join(self.keywords),
+            " ".join(self.use_cases),
+            " ".join(sorted(self.industries)),
+        ]
+        self.search_text: str = " ".join(p for p in parts if p)
+
+
+# NODES and PRODUCT_TAGS are static, so every row is built once.
+PRODUCT_ROWS: Dict[str, ProductRow] = {
+    pid: ProductRow(pid) for pid in {**NODES, **PRODUCT_TAGS}
+}
+
 
 def get_search_text(product_id: str) -> str:
-    """Build a rich text string for embedding from product tags + node info."""
-    node = NODES.get(product_id, {})
-    tags = PRODUCT_TAGS.get(product_id, {})
-    parts = [
-        node.get("name", ""),
-        node.get("subtitle", ""),
-        tags.get("description", ""),
-        " ".join(tags.get("keywords", [])),
-        " ".join(tags.get("use_cases", [])),
-        " ".join(tags.get("industries", [])),
-    ]
-    return " ".join(p for p in parts if p)
+    """Rich text string for embedding (precomputed on PRODUCT_ROWS)."""
+    row = PRODUCT_ROWS.get(product_id)
+    return row.search_text if row else ""
+
+
+# ═══════════════════════════════════════════════════════════════════════════════
+# KEYWORD MATCHING — token probes + one automaton for compound keywords
+# ═══════════════════════════════════════════════════════════════════════════════
+# Prompts are matched on whole words. Single-word keywords are a set probe
+# against the prompt's tokens; multi-word keywords ("oracle to bigquery",
+# "public sector") from PRODUCT_TAGS, ARCHITECTURE_PATTERNS and INDUSTRY_TAGS
+# all live in one Aho-Corasick automaton, so a single pass over the prompt
+# finds every compound hit. SOURCE_KEYWORDS keep their substring semantics in
+# a second automaton scanned over the raw lower-cased prompt. pyahocorasick
+# runs the scans in C when installed; otherwise a pure-Python automaton does.
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+class KeywordAutomaton:
+    """Aho-Corasick matcher: keyword → payloads, scanned in one linear pass."""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Set[Tuple[str, str]]] = [set()]
+        self._native = ahocorasick.Automaton() if ahocorasick is not None else None
+
+    def add(self, keyword: str, payload: Tuple[str, str]):
+        if self._native is not None:
+            payloads = self._native.get(keyword, None)
+            if payloads is None:
+                self._native.add_word(keyword, {payload})
+            else:
+                payloads.add(payload)
+            return
+        state = 0
+        for ch in keyword:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(set())
+            state = nxt
+        self._out[state].add(payload)
+
+    def build(self):
+        """Compute failure links (BFS) and fold suffix outputs into each state."""
+        if self._native is not None:
+            if len(self._native):
+                self._native.make_automaton()
+            else:
+                self._native = None  # nothing to match; the empty trie scans fine
+            return
+        queue = list(self._goto[0].values())
+        for state in queue:
+            for ch, nxt in self._goto[state].items():
+                f = self._fail[state]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[nxt] = self._goto[f].get(ch, 0)
+                self._out[nxt] |= self._out[self._fail[nxt]]
+                queue.append(nxt)
+
+    def scan(self, text: str) -> Set[Tuple[str, str]]:
+        found: Set[Tuple[str, str]] = set()
+        if self._native is not None:
+            for _, payloads in self._native.iter(text):
+                found |= payloads
+            return found
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if out[state]:
+                found |= out[state]
+        return found
+
+
+def _token_text(prompt: str) -> Tuple[List[str], str]:
+    """Lower-cased prompt tokens, and the same tokens as a space-padded string."""
+    toks = _TOKEN_RE.findall(prompt.lower())
+    return toks, " %s " % " ".join(toks)
+
+
+COMPOUND_KEYWORDS = KeywordAutomaton()
+_SINGLE_KW: Dict[str, str] = {}
+# Single-word industry keywords long enough to also match as a word prefix
+# ('retail' → 'retailer', 'pharma' → 'pharmaceutical'); shorter ones like
+# 'pos', 'gov' or 'store' would fire on 'postgres', 'governance', 'storage'
+_PREFIX_KW_MIN = 6
+_PREFIX_KW: Dict[str, str] = {}
+
+
+def _index_keyword(kw: str, kind: str, ident: str):
+    toks = _TOKEN_RE.findall(kw)
+    if len(toks) > 1:
+        COMPOUND_KEYWORDS.add(" %s " % " ".join(toks), (kind, ident))
+    elif kind == "industry":
+        _SINGLE_KW.setdefault(toks[0], ident)
+        if len(toks[0]) >= _PREFIX_KW_MIN:
+            _PREFIX_KW.setdefault(toks[0], ident)
+
+
+_INDUSTRY_ITEMS: Tuple[Tuple[str, dict], ...] = tuple(INDUSTRY_TAGS.items())
+_INDUSTRY_RANK: Dict[str, int] = {iid: i for i, (iid, _) in enumerate(_INDUSTRY_ITEMS)}
+
+for _iid, _ind in _INDUSTRY_ITEMS:
+    for _kw in _ind["keywords"]:
+        _index_keyword(_kw, "industry", _iid)
+COMPOUND_KEYWORDS.build()
+_PREFIX_KW_LENS: Tuple[int, ...] = tuple(sorted({len(k) for k in _PREFIX_KW}))
+
+SOURCE_KEYWORD_AUTOMATON = KeywordAutomaton()
+for _src_id, _kws in SOURCE_KEYWORDS.items():
+    for _kw in _kws:
+        SOURCE_KEYWORD_AUTOMATON.add(_kw, ("source", _src_id))
+SOURCE_KEYWORD_AUTOMATON.build()
 
 
 def match_industry(prompt: str) -> Optional[str]:
-    """Detect industry from prompt using INDUSTRY_TAGS keywords."""
-    p = prompt.lower()
-    for industry_id, ind in INDUSTRY_TAGS.items():
-        for kw in ind["keywords"]:
-            if kw in p:
-                return industry_id
-    return None
+    """Detect industry from prompt using INDUSTRY_TAGS keywords.
+
+    Keywords match whole words (plural 's' ignored); long single-word keywords
+    also match as a word prefix. When several industries match, the one listed
+    first in INDUSTRY_TAGS wins.
+    """
+    toks, text = _token_text(prompt)
+    words = set(toks)
+    words.update(t[:-1] for t in toks if len(t) > 3 and t.endswith("s"))
+    hits = {_SINGLE_KW[t] for t in words & _SINGLE_KW.keys()}
+    for t in words:
+        for n in _PREFIX_KW_LENS:
+            if n >= len(t):
+                break
+            ind = _PREFIX_KW.get(t[:n])
+            if ind is not None:
+                hits.add(ind)
+    hits.update(i for kind, i in COMPOUND_KEYWORDS.scan(text) if kind == "industry")
+    return min(hits, key=_INDUSTRY_RANK.__getitem__) if hits else None
+
@@ -14,7 +14,11 @@
 # ─────────────────────────────────────────────────
 # IMPORTS — every provider we might need
 # ─────────────────────────────────────────────────
-from diagrams import Diagram, Cluster, Edge
+import os
+from functools import partial
+from types import MappingProxyType
+
+from diagrams import Diagram, Cluster, Edge, Node
 
 # GCP
 from diagrams.gcp.analytics import (
@@ -57,21 +61,38 @@ from diagrams.saas.identity import Okta
 # ─────────────────────────────────────────────────
 # EDGE STYLES
 # ─────────────────────────────────────────────────
-E_BLUE       = {"color": "#4285f4", "penwidth": "2"}
-E_BLUE_DASH  = {"color": "#4285f4", "style": "dashed", "penwidth": "1.5"}
-E_ORANGE     = {"color": "#ea8600", "style": "dashed", "penwidth": "2"}
-E_PURPLE     = {"color": "#9334e6", "style": "dashed", "penwidth": "1.5"}
-E_GREEN      = {"color": "#34a853", "penwidth": "2"}
-E_GREEN_DASH = {"color": "#34a853", "style": "dashed", "penwidth": "1.5"}
-E_RED_DASH   = {"color": "#ea4335", "style": "dashed", "penwidth": "1.5"}
-E_TEAL       = {"color": "#00897b", "penwidth": "2"}
+E_BLUE       = MappingProxyType({"color": "#4285f4", "penwidth": "2"})
+E_BLUE_DASH  = MappingProxyType({"color": "#4285f4", "style": "dashed", "penwidth": "1.5"})
+E_ORANGE     = MappingProxyType({"color": "#ea8600", "style": "dashed", "penwidth": "2"})
+E_PURPLE     = MappingProxyType({"color": "#9334e6", "style": "dashed", "penwidth": "1.5"})
+E_GREEN      = MappingProxyType({"color": "#34a853", "penwidth": "2"})
+E_GREEN_DASH = MappingProxyType({"color": "#34a853", "style": "dashed", "penwidth": "1.5"})
+E_RED_DASH   = MappingProxyType({"color": "#ea4335", "style": "dashed", "penwidth": "1.5"})
+E_TEAL       = MappingProxyType({"color": "#00897b", "penwidth": "2"})
 
 # Cross-cutting pillar edge styles (ALL dashed)
-E_QUALITY_DASH = {"color": "#a21caf", "style": "dashed", "penwidth": "1.5"}
-E_ORC_DASH     = {"color": "#0284c7", "style": "dashed", "penwidth": "1.5"}
-E_OBS_DASH     = {"color": "#dc2626", "style": "dashed", "penwidth": "1.5"}
-E_GOV_DASH     = {"color": "#16a34a", "style": "dashed", "penwidth": "1.5"}
-E_SEC_DASH     = {"color": "#d97706", "style": "dashed", "penwidth": "1.5"}
+E_QUALITY_DASH = MappingProxyType({"color": "#a21caf", "style": "dashed", "penwidth": "1.5"})
+E_ORC_DASH     = MappingProxyType({"color": "#0284c7", "style": "dashed", "penwidth": "1.5"})
+E_OBS_DASH     = MappingProxyType({"color": "#dc2626", "style": "dashed", "penwidth": "1.5"})
+E_GOV_DASH     = MappingProxyType({"color": "#16a34a", "style": "dashed", "penwidth": "1.5"})
+E_SEC_DASH     = MappingProxyType({"color": "#d97706", "style": "dashed", "penwidth": "1.5"})
+E_INVIS        = MappingProxyType({"style": "invis"})
+
+# Edge factories — the style kwargs are bound once, not re-splatted per edge
+EF_BLUE         = partial(Edge, **E_BLUE)
+EF_BLUE_DASH    = partial(Edge, **E_BLUE_DASH)
+EF_ORANGE       = partial(Edge, **E_ORANGE)
+EF_PURPLE       = partial(Edge, **E_PURPLE)
+EF_GREEN        = partial(Edge, **E_GREEN)
+EF_GREEN_DASH   = partial(Edge, **E_GREEN_DASH)
+EF_RED_DASH     = partial(Edge, **E_RED_DASH)
+EF_TEAL         = partial(Edge, **E_TEAL)
+EF_QUALITY_DASH = partial(Edge, **E_QUALITY_DASH)
+EF_ORC_DASH     = partial(Edge, **E_ORC_DASH)
+EF_OBS_DASH     = partial(Edge, **E_OBS_DASH)
+EF_GOV_DASH     = partial(Edge, **E_GOV_DASH)
+EF_SEC_DASH     = partial(Edge, **E_SEC_DASH)
+EF_INVIS        = partial(Edge, **E_INVIS)
 
 # ─────────────────────────────────────────────────
 # CLUSTER STYLES
@@ -96,6 +117,156 @@ CS_SEC       = {"style": "dashed", "color": "#fbbf24", "bgcolor": "#fffbeb", "fo
 CS_GOV       = {"style": "dashed", "color": "#4ade80", "bgcolor": "#f0fdf4", "fontsize": "11", "fontcolor": "#16a34a", "penwidth": "2"}
 
 
+# ─────────────────────────────────────────────────
+# EDGE TABLE — (src, dst, style, label), drawn in one loop inside the diagram.
+# Names refer to the node variables below; edges whose endpoints were sliced
+# away are dropped.
+# ─────────────────────────────────────────────────
+STYLES = {
+    "BLUE": EF_BLUE, "BLUE_DASH": EF_BLUE_DASH, "ORANGE": EF_ORANGE,
+    "PURPLE": EF_PURPLE, "GREEN": EF_GREEN, "GREEN_DASH": EF_GREEN_DASH,
+    "RED_DASH": EF_RED_DASH, "TEAL": EF_TEAL, "INVIS": EF_INVIS,
+    "QUALITY_DASH": EF_QUALITY_DASH, "ORC_DASH": EF_ORC_DASH,
+    "OBS_DASH": EF_OBS_DASH, "GOV_DASH": EF_GOV_DASH, "SEC_DASH": EF_SEC_DASH,
+}
+
+_EDGES = [
+    # ═══════════════════════════════════════════════════════
+    #  INVISIBLE SPINE — forces L→R layer sequencing
+    # ═══════════════════════════════════════════════════════
+    ("oracle_db",        "cloud_vpn",         "INVIS",         ""),
+    ("cloud_vpn",        "datastream",        "INVIS",         ""),
+    ("datastream",       "gcs_raw",           "INVIS",         ""),
+    ("gcs_raw",          "dataform",          "INVIS",         ""),
+    ("dataform",         "bronze",            "INVIS",         ""),
+    ("bronze",           "silver",            "INVIS",         ""),
+    ("silver",           "gold",              "INVIS",         ""),
+    ("gold",             "looker",            "INVIS",         ""),
+    ("looker",           "analysts",          "INVIS",         ""),
+
+    # ═══════════════════════════════════════════════════════
+    #  WIRING — Group-to-group connections (one edge per pair)
+    # ═══════════════════════════════════════════════════════
+
+    # ── Vendors Identity → L2 (one edge per vendor) ──
+    ("entra_id",         "cloud_iam",         "PURPLE",        "SSO"),
+    ("cyberark",         "secret_manager",    "PURPLE",        "PAM sync"),
+    ("keeper",           "secret_manager",    "PURPLE",        "secrets"),
+
+    # ── L1 → L2/L3 (one edge per source node) ──
+    # On-Prem sources → L2 VPN
+    ("oracle_db",        "cloud_vpn",         "ORANGE",        "JDBC/CDC"),
+    ("sqlserver_db",     "cloud_vpn",         "ORANGE",        "JDBC/CDC"),
+    ("postgresql_db",    "cloud_vpn",         "ORANGE",        "WAL CDC"),
+    ("mongodb_db",       "cloud_vpn",         "ORANGE",        "Change Strm"),
+    # GCP-Native → L3 direct
+    ("cloud_sql",        "datastream",        "BLUE",          "CDC"),
+    ("cloud_spanner",    "dataflow_ing",      "BLUE",          "Change Strm"),
+    # SaaS → L3 direct
+    ("salesforce",       "cloud_functions",   "ORANGE",        "API"),
+    ("salesforce",       "fivetran",          "ORANGE",        "bulk"),
+    ("workday",          "matillion",         "ORANGE",        "API"),
+    ("servicenow_src",   "cloud_functions",   "ORANGE",        "API"),
+    ("sap_src",          "data_fusion",       "ORANGE",        "OData"),
+    # Events → L3 direct
+    ("kafka_stream",     "pubsub",            "ORANGE",        "subscribe"),
+    # Files → L3 direct
+    ("aws_s3",           "bq_dts",            "ORANGE",        "BQ DTS S3"),
+    ("aws_s3",           "storage_transfer",  "ORANGE",        "transfer"),
+    ("sftp_server",      "cloud_functions",   "ORANGE",        "pull files"),
+
+    # ── L2 internal (one chain) ──
+    ("cloud_vpn",        "vpc",               "BLUE_DASH",     ""),
+    ("cloud_interco",    "vpc",               "BLUE_DASH",     ""),
+    ("vpc",              "vpc_sc",            "BLUE_DASH",     ""),
+    ("cloud_iam",        "secret_manager",    "BLUE_DASH",     "WIF"),
+
+    # ── L2 → L3 (one auth edge) ──
+    ("cloud_iam",        "datastream",        "BLUE",          "auth"),
+
+    # ── L3 → L4 (one edge per ingestion tool → landing) ──
+    ("datastream",       "gcs_raw",           "BLUE",          "CDC"),
+    ("pubsub",           "dataflow_ing",      "BLUE",          "events"),
+    ("dataflow_ing",     "bq_staging",        "BLUE",          "stream"),
+    ("bq_dts",           "bq_staging",        "BLUE",          "scheduled"),
+    ("storage_transfer", "gcs_raw",           "BLUE",          "files"),
+    ("cloud_functions",  "gcs_raw",           "BLUE",          "write"),
+    ("data_fusion",      "gcs_raw",           "BLUE",          "pipeline"),
+    ("matillion",        "bq_staging",        "BLUE",          "ELT"),
+    ("fivetran",         "bq_staging",        "BLUE",          "sync"),
+
+    # ── L4 → L5 (one edge per landing zone → processing) ──
+    ("gcs_raw",          "dataform",          "BLUE",          "read"),
+    ("gcs_raw",          "dataproc",          "BLUE",          "read"),
+    ("bq_staging",       "dataform",          "BLUE",          "SQL ELT"),
+    ("bq_staging",       "dataflow_proc",     "BLUE",          "stream"),
+
+    # ── L5 → L6 (one edge per processor → medallion) ──
+    ("dataform",         "bronze",            "TEAL",          "transform"),
+    ("dataflow_proc",    "bronze",            "TEAL",          "stream"),
+    ("dataproc",         "bronze",            "TEAL",          "spark"),
+
+    # ── L6 internal (medallion chain) ──
+    ("bronze",           "silver",            "BLUE",          "quality gate"),
+    ("silver",           "gold",              "BLUE",          "quality gate"),
+
+    # ── L6 → L7 (one edge per serving target) ──
+    ("gold",             "looker",            "GREEN",         "governed BI"),
+    ("gold",             "looker_studio",     "GREEN",         "free dash"),
+    ("gold",             "analytics_hub",     "GREEN",         "data exchange"),
+    ("gold",             "cloud_run",         "GREEN",         "serving API"),
+    ("gold",             "vertex_ai",         "GREEN",         "ML features"),
+    # L6 → External BI
+    ("gold",             "power_bi",          "ORANGE",        "DirectQuery"),
+    ("gold",             "slicer_dicer",      "ORANGE",        "embed"),
+
+    # ── L7 → L8 (one edge per serving → consumer) ──
+    ("looker",           "analysts",          "BLUE",          ""),
+    ("looker",           "executives",        "BLUE",          ""),
+    ("vertex_ai",        "data_scientists",   "BLUE",          ""),
+    ("cloud_run",        "downstream_sys",    "BLUE",          ""),
+    ("power_bi",         "analysts",          "ORANGE",        ""),
+
+    # ══════════════════════════════════════════════════════
+    # CROSS-CUTTING WIRING (one dashed edge per connection)
+    # ══════════════════════════════════════════════════════
+
+    # ── Quality Gate (dashed fuchsia) ──
+    ("dataform",         "dataplex_dq",       "QUALITY_DASH",  "DQ check"),
+    ("dataplex_dq",      "bronze",            "QUALITY_DASH",  "gate"),
+    ("dataform",         "cloud_dlp",         "QUALITY_DASH",  "PII scan"),
+    ("cloud_dlp",        "silver",            "QUALITY_DASH",  "mask"),
+
+    # ── Orchestration (dashed sky blue) ──
+    ("cloud_composer",   "dataform",          "ORC_DASH",      "trigger"),
+    ("cloud_composer",   "dataflow_ing",      "ORC_DASH",      "trigger"),
+    ("cloud_scheduler",  "bq_dts",            "ORC_DASH",      "cron"),
+
+    # ── Observability (dashed red) — pipeline → obs ──
+    ("dataflow_ing",     "cloud_monitoring",  "OBS_DASH",      "metrics"),
+    ("dataform",         "cloud_logging",     "OBS_DASH",      "logs"),
+    ("cloud_composer",   "cloud_logging",     "OBS_DASH",      "DAG logs"),
+    # Obs internal
+    ("cloud_monitoring", "pagerduty_inc",     "OBS_DASH",      "alerts"),
+    ("cloud_logging",    "splunk_siem",       "OBS_DASH",      "SIEM"),
+    ("cloud_monitoring", "dynatrace_apm",     "OBS_DASH",      "APM"),
+    ("audit_logs",       "cloud_logging",     "OBS_DASH",      "export"),
+
+    # ── Security (dashed amber) ──
+    ("cloud_kms",        "gold",              "SEC_DASH",      "CMEK"),
+    ("audit_logs",       "splunk_siem",       "SEC_DASH",      "export"),
+    ("scc_pillar",       "wiz_cspm",          "SEC_DASH",      "posture"),
+
+    # ── Governance (dashed green) ──
+    ("dataplex",         "data_catalog",      "GOV_DASH",      "lineage"),
+    ("dataplex",         "dataplex_dq",       "GOV_DASH",      "quality"),
+    ("data_catalog",     "cloud_dlp",         "GOV_DASH",      "classify"),
+
+    # ── GRC vendor (dashed purple) ──
+    ("archer_grc",       "audit_logs",        "PURPLE",        "compliance"),
+]
+
+
 # ═══════════════════════════════════════════════════════════
 # THE MASTER DIAGRAM
 # ═══════════════════════════════════════════════════════════
@@ -112,7 +283,8 @@ with Diagram(
         "pad": "0.8",
         "nodesep": "0.6",
         "ranksep": "1.2",
-        "dpi": "150",
+        "dpi": os.environ.get("ARCHGEN_DPI", "96"),
+        "layout": "dot",
     },
     node_attr={"fontsize": "10"},
     edge_attr={"fontsize": "9"},
@@ -274,138 +446,11 @@ with Diagram(
         executives      = Users("Executives\nReports")
 
     # ═══════════════════════════════════════════════════════
-    #  INVISIBLE SPINE — forces L→R layer sequencing
+    #  WIRING — every edge in _EDGES whose endpoints exist
     # ═══════════════════════════════════════════════════════
-    E_INVIS = {"style": "invis"}
-    oracle_db    >> Edge(**E_INVIS) >> cloud_vpn
-    cloud_vpn    >> Edge(**E_INVIS) >> datastream
-    datastream   >> Edge(**E_INVIS) >> gcs_raw
-    gcs_raw      >> Edge(**E_INVIS) >> dataform
-    dataform     >> Edge(**E_INVIS) >> bronze
-    bronze       >> Edge(**E_INVIS) >> silver
-    silver       >> Edge(**E_INVIS) >> gold
-    gold         >> Edge(**E_INVIS) >> looker
-    looker       >> Edge(**E_INVIS) >> analysts
-
-    # ═══════════════════════════════════════════════════════
-    #  WIRING — Group-to-group connections (one edge per pair)
-    # ═══════════════════════════════════════════════════════
-
-    # ── Vendors Identity → L2 (one edge per vendor) ──
-    entra_id >> Edge(**E_PURPLE, label="SSO")      >> cloud_iam
-    cyberark >> Edge(**E_PURPLE, label="PAM sync")  >> secret_manager
-    keeper   >> Edge(**E_PURPLE, label="secrets")   >> secret_manager
-
-    # ── L1 → L2/L3 (one edge per source node) ──
-    # On-Prem sources → L2 VPN
-    oracle_db     >> Edge(**E_ORANGE, label="JDBC/CDC")     >> cloud_vpn
-    sqlserver_db  >> Edge(**E_ORANGE, label="JDBC/CDC")     >> cloud_vpn
-    postgresql_db >> Edge(**E_ORANGE, label="WAL CDC")      >> cloud_vpn
-    mongodb_db    >> Edge(**E_ORANGE, label="Change Strm")  >> cloud_vpn
-    # GCP-Native → L3 direct
-    cloud_sql     >> Edge(**E_BLUE, label="CDC")            >> datastream
-    cloud_spanner >> Edge(**E_BLUE, label="Change Strm")    >> dataflow_ing
-    # SaaS → L3 direct
-    salesforce     >> Edge(**E_ORANGE, label="API")         >> cloud_functions
-    salesforce     >> Edge(**E_ORANGE, label="bulk")        >> fivetran
-    workday        >> Edge(**E_ORANGE, label="API")         >> matillion
-    servicenow_src >> Edge(**E_ORANGE, label="API")         >> cloud_functions
-    sap_src        >> Edge(**E_ORANGE, label="OData")       >> data_fusion
-    # Events → L3 direct
-    kafka_stream >> Edge(**E_ORANGE, label="subscribe")     >> pubsub
-    # Files → L3 direct
-    aws_s3      >> Edge(**E_ORANGE, label="BQ DTS S3")      >> bq_dts
-    aws_s3      >> Edge(**E_ORANGE, label="transfer")       >> storage_transfer
-    sftp_server >> Edge(**E_ORANGE, label="pull files")     >> cloud_functions
-
-    # ── L2 internal (one chain) ──
-    cloud_vpn    >> Edge(**E_BLUE_DASH) >> vpc
-    cloud_interco >> Edge(**E_BLUE_DASH) >> vpc
-    vpc          >> Edge(**E_BLUE_DASH) >> vpc_sc
-    cloud_iam    >> Edge(**E_BLUE_DASH, label="WIF") >> secret_manager
-
-    # ── L2 → L3 (one auth edge) ──
-    cloud_iam >> Edge(**E_BLUE, label="auth") >> datastream
-
-    # ── L3 → L4 (one edge per ingestion tool → landing) ──
-    datastream       >> Edge(**E_BLUE, label="CDC")       >> gcs_raw
-    pubsub           >> Edge(**E_BLUE, label="events")    >> dataflow_ing
-    dataflow_ing     >> Edge(**E_BLUE, label="stream")    >> bq_staging
-    bq_dts           >> Edge(**E_BLUE, label="scheduled") >> bq_staging
-    storage_transfer >> Edge(**E_BLUE, label="files")     >> gcs_raw
-    cloud_functions  >> Edge(**E_BLUE, label="write")     >> gcs_raw
-    data_fusion      >> Edge(**E_BLUE, label="pipeline")  >> gcs_raw
-    matillion        >> Edge(**E_BLUE, label="ELT")       >> bq_staging
-    fivetran         >> Edge(**E_BLUE, label="sync")      >> bq_staging
-
-    # ── L4 → L5 (one edge per landing zone → processing) ──
-    gcs_raw    >> Edge(**E_BLUE, label="read")    >> dataform
-    gcs_raw    >> Edge(**E_BLUE, label="read")    >> dataproc
-    bq_staging >> Edge(**E_BLUE, label="SQL ELT") >> dataform
-    bq_staging >> Edge(**E_BLUE, label="stream")  >> dataflow_proc
-
-    # ── L5 → L6 (one edge per processor → medallion) ──
-    dataform      >> Edge(**E_TEAL, label="transform") >> bronze
-    dataflow_proc >> Edge(**E_TEAL, label="stream")    >> bronze
-    dataproc      >> Edge(**E_TEAL, label="spark")     >> bronze
-
-    # ── L6 internal (medallion chain) ──
-    bronze >> Edge(**E_BLUE, label="quality gate") >> silver
-    silver >> Edge(**E_BLUE, label="quality gate") >> gold
-
-    # ── L6 → L7 (one edge per serving target) ──
-    gold >> Edge(**E_GREEN, label="governed BI")   >> looker
-    gold >> Edge(**E_GREEN, label="free dash")     >> looker_studio
-    gold >> Edge(**E_GREEN, label="data exchange") >> analytics_hub
-    gold >> Edge(**E_GREEN, label="serving API")   >> cloud_run
-    gold >> Edge(**E_GREEN, label="ML features")   >> vertex_ai
-    # L6 → External BI
-    gold >> Edge(**E_ORANGE, label="DirectQuery") >> power_bi
-    gold >> Edge(**E_ORANGE, label="embed")       >> slicer_dicer
-
-    # ── L7 → L8 (one edge per serving → consumer) ──
-    looker       >> Edge(**E_BLUE)   >> analysts
-    looker       >> Edge(**E_BLUE)   >> executives
-    vertex_ai    >> Edge(**E_BLUE)   >> data_scientists
-    cloud_run    >> Edge(**E_BLUE)   >> downstream_sys
-    power_bi     >> Edge(**E_ORANGE) >> analysts
-
-    # ══════════════════════════════════════════════════════
-    # CROSS-CUTTING WIRING (one dashed edge per connection)
-    # ══════════════════════════════════════════════════════
-
-    # ── Quality Gate (dashed fuchsia) ──
-    dataform    >> Edge(**E_QUALITY_DASH, label="DQ check") >> dataplex_dq
-    dataplex_dq >> Edge(**E_QUALITY_DASH, label="gate")     >> bronze
-    dataform    >> Edge(**E_QUALITY_DASH, label="PII scan") >> cloud_dlp
-    cloud_dlp   >> Edge(**E_QUALITY_DASH, label="mask")     >> silver
-
-    # ── Orchestration (dashed sky blue) ──
-    cloud_composer  >> Edge(**E_ORC_DASH, label="trigger") >> dataform
-    cloud_composer  >> Edge(**E_ORC_DASH, label="trigger") >> dataflow_ing
-    cloud_scheduler >> Edge(**E_ORC_DASH, label="cron")    >> bq_dts
-
-    # ── Observability (dashed red) — pipeline → obs ──
-    dataflow_ing   >> Edge(**E_OBS_DASH, label="metrics")  >> cloud_monitoring
-    dataform       >> Edge(**E_OBS_DASH, label="logs")     >> cloud_logging
-    cloud_composer >> Edge(**E_OBS_DASH, label="DAG logs")  >> cloud_logging
-    # Obs internal
-    cloud_monitoring >> Edge(**E_OBS_DASH, label="alerts") >> pagerduty_inc
-    cloud_logging    >> Edge(**E_OBS_DASH, label="SIEM")   >> splunk_siem
-    cloud_monitoring >> Edge(**E_OBS_DASH, label="APM")    >> dynatrace_apm
-    audit_logs       >> Edge(**E_OBS_DASH, label="export") >> cloud_logging
-
-    # ── Security (dashed amber) ──
-    cloud_kms  >> Edge(**E_SEC_DASH, label="CMEK")   >> gold
-    audit_logs >> Edge(**E_SEC_DASH, label="export")  >> splunk_siem
-    scc_pillar >> Edge(**E_SEC_DASH, label="posture") >> wiz_cspm
-
-    # ── Governance (dashed green) ──
-    dataplex     >> Edge(**E_GOV_DASH, label="lineage")  >> data_catalog
-    dataplex     >> Edge(**E_GOV_DASH, label="quality")  >> dataplex_dq
-    data_catalog >> Edge(**E_GOV_DASH, label="classify") >> cloud_dlp
-
-    # ── GRC vendor (dashed purple) ──
-    archer_grc >> Edge(**E_PURPLE, label="compliance") >> audit_logs
+    NAMES = {name: obj for name, obj in globals().items() if isinstance(obj, Node)}
+    for src, dst, style, label in _EDGES:
+        if src in NAMES and dst in NAMES:
+            NAMES[src] >> STYLES[style](label=label) >> NAMES[dst]
 
 print("✅ Master Blueprint rendered successfully")
@@ -3,9 +3,15 @@
 ArchGen Engine — CLI entry point
 Called by Express server via child_process.spawn
 
-Usage: python generate.py "<prompt>" <output_dir>
+Usage: python generate.py "<prompt>" <output_dir> [--hi-res]
 Output: JSON to stdout with decisions, diagram JSON, and optional PNG path
 
+Worker mode: ARCHGEN_WORKER=1 python generate.py
+  Reads NDJSON requests on stdin, writes NDJSON responses on stdout.
+
+Batch mode: python generate.py --batch <output_dir> < prompts.txt
+  One prompt per line, rendered in parallel → JSON array on stdout.
+
 Pipeline:
   1. SmartRouter.route()  → sources + industry + decisions (if KB available)
      OR parse_prompt()    → source IDs (keyword fallback)
@@ -17,7 +23,11 @@ Pipeline:
 import sys
 import os
 import json
+import atexit
 import hashlib
+import functools
+import threading
+from collections import OrderedDict
 from pathlib import Path
 
 ENGINE_DIR = Path(__file__).parent
@@ -25,26 +35,124 @@ sys.path.insert(0, str(ENGINE_DIR))
 
 from gcp_blueprint import parse_prompt, auto_wire, build_title, match_industry, NODES, INDUSTRY_TAGS
 
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+# Node ids in sorted order: sorted subsets come from a filter, not a sort
+_SORTED_NODE_IDS = tuple(sorted(NODES))
+
+
+def _emit(stream, obj):
+    """Write one JSON document + newline to a text stream's byte buffer."""
+    stream.flush()
+    stream.buffer.write(_dumps(obj) + b"\n")
+    stream.buffer.flush()
+
+
+_ROUTER = None
+_ROUTER_LOCK = threading.Lock()  # guards construction only; SmartRouter is thread-safe
+
+
+def _close_router():
+    if _ROUTER is not None:
+        _ROUTER.close()
+
+
+def _get_router():
+    """Process-wide SmartRouter, so its prompt LRU and DB pool survive between prompts."""
+    global _ROUTER
+    if _ROUTER is None:
+        with _ROUTER_LOCK:
+            if _ROUTER is None:
+                from kb_query import SmartRouter
+                _ROUTER = SmartRouter()
+                atexit.register(_close_router)
+    return _ROUTER
+
+
+# Normalised prompt → _kb_route() entry, most recently used last
+_KB_ROUTES: OrderedDict = OrderedDict()
+_KB_ROUTES_MAX = 1024
+_KB_ROUTES_LOCK = threading.Lock()
+
+
+def _kb_route(prompt: str) -> dict:
+    """
+    SmartRouter result for a prompt, memoised per process (keyed on the
+    lower-cased, whitespace-collapsed prompt) so repeats skip the DB + Haiku
+    round trip. The router itself sees the prompt as typed. SmartRouter
+    degrades to keyword matching (tier 3) when the DB or Haiku is
+    unavailable; those results aren't memoised, so the next request retries
+    the full route.
+    """
+    prompt_norm = " ".join(prompt.lower().split())
+    with _KB_ROUTES_LOCK:
+        entry = _KB_ROUTES.get(prompt_norm)
+        if entry is not None:
+            _KB_ROUTES.move_to_end(prompt_norm)
+            return entry
+    # The network round trips run unlocked, so worker threads overlap them
+    entry = _kb_entry(prompt, _get_router().route(prompt))
+    if entry["tier"] != 3:
+        with _KB_ROUTES_LOCK:
+            _KB_ROUTES[prompt_norm] = entry
+            _KB_ROUTES.move_to_end(prompt_norm)
+            if len(_KB_ROUTES) > _KB_ROUTES_MAX:
+                _KB_ROUTES.popitem(last=False)
+    return entry
+
+
+def _kb_entry(prompt: str, result: dict) -> dict:
+    """Frozen copy of a SmartRouter result, safe to share between requests."""
+    return {
+        "sources":   frozenset(result["sources"]),
+        "keep_set":  frozenset(result["keep_set"]),
+        "decisions": tuple(result["decisions"]),
+        "title":     result["title"],
+        "tier":      result.get("tier", 2),
+        "industry":  result.get("industry"),
+        # Rendered canvas from the DB cache; filled in by _remember_diagram()
+        "diagram_json": result.get("diagram_json"),
+        "prompt":       prompt,
+    }
+
+
+def _remember_diagram(routed: dict, diagram: dict):
+    """Keep a freshly built canvas with the KB route so repeats skip build_diagram()."""
+    entry = routed.get("kb_entry")
+    if entry is None or entry["diagram_json"] is not None:
+        return
+    entry["diagram_json"] = diagram
+    try:
+        _get_router().store_diagram(entry["prompt"], diagram)
+    except Exception as e:
+        print(f"Storing cached diagram failed: {e}", file=sys.stderr)
+
 
 def route_prompt(prompt: str) -> dict:
     """
     Try SmartRouter first, fall back to keyword matching.
-    Always returns: {sources, keep_set, decisions, title, tier, industry}
+    Always returns: {sources, keep_set, decisions, title, tier, industry,
+    diagram_json}; SmartRouter results also carry their memo entry as kb_entry.
     """
 
     # ── Try SmartRouter (KB + Haiku) ──
     try:
-        from kb_query import SmartRouter
-        router = SmartRouter()
-        result = router.route(prompt)
-        router.close()
+        cached = _kb_route(prompt)
+        # Callers mutate these, so hand out fresh copies
         return {
-            "sources":   result["sources"],
-            "keep_set":  result["keep_set"],
-            "decisions": result["decisions"],
-            "title":     result["title"],
-            "tier":      result.get("tier", 2),
-            "industry":  result.get("industry"),
+            **cached,
+            "sources":   set(cached["sources"]),
+            "keep_set":  set(cached["keep_set"]),
+            "decisions": list(cached["decisions"]),
+            "industry":  dict(cached["industry"]) if cached["industry"] else None,
+            "kb_entry":  cached,
         }
     except ImportError:
         # psycopg2 not installed — expected on fresh setup
@@ -59,7 +167,6 @@ def route_prompt(prompt: str) -> dict:
         sources = {"src_oracle"}
 
     keep, decisions = auto_wire(sources)
-    keep |= sources
 
     # Check industry keywords even without KB
     ind_id = match_industry(prompt)
@@ -83,17 +190,125 @@ def route_prompt(prompt: str) -> dict:
         "title":     title,
         "tier":      3,
         "industry":  industry,
+        "diagram_json": None,
     }
 
 
-def main():
-    if len(sys.argv) < 3:
-        print(json.dumps({"error": "Usage: generate.py <prompt> <output_dir>"}))
-        sys.exit(1)
+@functools.cache
+def _master_source() -> str:
+    """gcp_master_blueprint.py source, read once per process ("" if missing)."""
+    master_path = ENGINE_DIR / "gcp_master_blueprint.py"
+    return master_path.read_text() if master_path.exists() else ""
+
+
+def _render_key(keep_set, title: str, master_source: str, layout: str = "dot",
+                dpi: str = "96") -> str:
+    """Content key for a rendered PNG: changes whenever its inputs change."""
+    h = hashlib.blake2b(digest_size=8)
+    for part in (*sorted(keep_set), title, layout, dpi, master_source):
+        h.update(part.encode())
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+# ═══ Anti-pattern rules: (predicate(sources, keep), message) ═══
+_STREAMING = frozenset({"src_kafka", "src_confluent", "src_kinesis"})
+_BATCH     = frozenset({"src_oracle", "src_sqlserver", "src_postgresql", "src_mysql"})
+_PII_SRC   = frozenset({"src_salesforce", "src_workday", "src_hubspot"})
+
+_ANTI_RULES = (
+    (lambda s, k: not _STREAMING.isdisjoint(s) and _BATCH.isdisjoint(s),
+     "Streaming-only — consider batch sources for backfill"),
+    (lambda s, k: not _PII_SRC.isdisjoint(s) and "proc_dlp" not in k,
+     "SaaS source without DLP — PII risk"),
+)
+
+
+# Background PNG renders (worker mode): output_name → Future. Graphviz runs in
+# its own subprocess, so threads are enough to keep several renders going.
+_PNG_POOL = None
+_PNG_JOBS: dict = {}
+
+
+def _render_png_job(sliced_source: str, output_name: str) -> str:
+    """Render the PNG, then drop a .done marker so readers know it's complete."""
+    from archgen_slicer import render_sliced
+    png_path = render_sliced(sliced_source, output_name)
+    Path(f"{output_name}.done").touch()
+    return png_path
+
+
+def _submit_png(sliced_source: str, output_name: str):
+    global _PNG_POOL
+    job = _PNG_JOBS.get(output_name)
+    if job is not None and not job.done():
+        return
+    if _PNG_POOL is None:
+        from concurrent.futures import ThreadPoolExecutor
+        _PNG_POOL = ThreadPoolExecutor(max_workers=max(1, (os.cpu_count() or 2) // 2))
+    job = _PNG_POOL.submit(_render_png_job, sliced_source, output_name)
+    _PNG_JOBS[output_name] = job
+
+    def _finished(f):
+        _PNG_JOBS.pop(output_name, None)
+        if f.exception() is not None:
+            # No .done marker, so the next request for it queues a retry
+            print(f"PNG render failed: {f.exception()}", file=sys.stderr)
+    job.add_done_callback(_finished)
+
+
+def _slice(keep_set: frozenset, title: str, output_dir: str, hi_res: bool = False):
+    """
+    Slice the master blueprint → (output_name, python_source, removed).
+    Previews render at DEFAULT_DPI; hi_res slices for a separate 150 dpi file.
+    slice_blueprint keeps its own LRU of slices, so repeats are cheap.
+    """
+    from archgen_slicer import slice_blueprint, choose_layout, DEFAULT_DPI, HI_RES_DPI
+    master_source = _master_source()
+    layout = choose_layout(len(keep_set))
+    dpi = HI_RES_DPI if hi_res else DEFAULT_DPI
+    key = _render_key(keep_set, title, master_source, layout, dpi)
+    output_name = os.path.join(output_dir, f"arch_{key}_{dpi}")
+    sliced_source, removed = slice_blueprint(master_source, keep_set, title, output_name, layout, dpi)
+    return output_name, sliced_source, frozenset(removed)
 
-    prompt = sys.argv[1]
-    output_dir = sys.argv[2]
-    os.makedirs(output_dir, exist_ok=True)
+
+def _cached_render(keep_set: frozenset, title: str, output_dir: str, background: bool = False,
+                   hi_res: bool = False):
+    """
+    Slice + render the master blueprint → (png_path, python_source, removed).
+    Graphviz only runs when the keyed PNG isn't already complete on disk; with
+    background=True it is queued and png_path is where it will appear. The
+    disk check runs on every call (the file may have been cleaned up since).
+    """
+    output_name, sliced_source, removed = _slice(keep_set, title, output_dir, hi_res)
+    if not os.path.exists(f"{output_name}.done"):
+        if background:
+            _submit_png(sliced_source, output_name)
+        else:
+            _render_png_job(sliced_source, output_name)
+    return f"{output_name}.png", sliced_source, removed
+
+
+# Output dirs already created by this process; skips the per-request stat walk
+_ENSURED_DIRS: set = set()
+
+
+def _ensure_dir(path: str):
+    if path not in _ENSURED_DIRS:
+        os.makedirs(path, exist_ok=True)
+        _ENSURED_DIRS.add(path)
+
+
+def handle(prompt: str, output_dir: str, background_png: bool = False,
+           hi_res: bool = False) -> dict:
+    """
+    Run the full pipeline for one prompt → JSON-serialisable result dict.
+    With background_png the PNG is rendered after returning; png_pending tells
+    the caller to wait for <png_path minus .png>.done. hi_res asks for the
+    150 dpi PNG instead of the default preview.
+    """
+    _ensure_dir(output_dir)
 
     try:
         # Route the prompt (SmartRouter or keyword fallback)
@@ -104,69 +319,154 @@ def main():
         title     = routed["title"]
 
         # Anti-patterns (simple rule-based)
-        anti_patterns = []
-        if any(s in sources for s in ("src_kafka", "src_confluent", "src_kinesis")):
-            if not any(s in sources for s in ("src_oracle", "src_sqlserver", "src_postgresql", "src_mysql")):
-                anti_patterns.append("Streaming-only — consider batch sources for backfill")
-        if any(s in sources for s in ("src_salesforce", "src_workday", "src_hubspot")):
-            if "proc_dlp" not in keep:
-                anti_patterns.append("SaaS source without DLP — PII risk")
-
-        # Build canvas JSON
-        from diagram_builder import build_diagram
-        diagram = build_diagram(keep, title, decisions, anti_patterns)
+        anti_patterns = [msg for pred, msg in _ANTI_RULES if pred(sources, keep)]
+
+        # Build canvas JSON (a cache hit that already has it skips the layout)
+        diagram = routed["diagram_json"]
+        if diagram is None:
+            from diagram_builder import build_diagram
+            diagram = build_diagram(keep, title, decisions, anti_patterns)
+            _remember_diagram(routed, diagram)
 
         # Optional PNG via legacy path
         png_path = ""
         png_filename = ""
+        png_pending = False
         python_source = ""
         removed = set()
 
         try:
-            from archgen_slicer import decide_products, slice_blueprint, render_sliced
+            from archgen_slicer import decide_products, choose_layout
             old_result = decide_products(prompt)
-            master_path = ENGINE_DIR / "gcp_master_blueprint.py"
-            if master_path.exists():
-                master_source = master_path.read_text()
-                prompt_hash = hashlib.md5(prompt.encode()).hexdigest()[:8]
-                output_name = os.path.join(output_dir, f"arch_{prompt_hash}")
-                sliced_source, removed = slice_blueprint(
-                    master_source, old_result["keep_set"],
-                    old_result["title"], output_name,
+            if _master_source():
+                png_layout = choose_layout(len(old_result["keep_set"]))
+                if png_layout != "dot":
+                    decisions.append(
+                        f"PNG layout: {png_layout} (force-directed, "
+                        f"{len(old_result['keep_set'])} products)"
+                    )
+                png_path, python_source, removed = _cached_render(
+                    frozenset(old_result["keep_set"]), old_result["title"], output_dir,
+                    background_png, hi_res,
                 )
-                png_path = render_sliced(sliced_source, output_name)
                 png_filename = os.path.basename(png_path)
-                python_source = sliced_source
+                png_pending = not os.path.exists(png_path[:-len(".png")] + ".done")
         except Exception:
             pass  # PNG is optional
 
-        # JSON output
-        output = {
+        kept = [n for n in _SORTED_NODE_IDS if n in keep]
+        if len(kept) != len(keep):
+            kept = sorted(keep)
+
+        return {
             "success":       True,
             "title":         title,
             "decisions":     decisions,
             "anti_patterns": anti_patterns,
-            "kept":          sorted(list(keep)),
-            "removed":       sorted(list(removed)),
+            "kept":          kept,
+            "removed":       sorted(removed),
             "kept_count":    len(keep),
             "removed_count": len(removed),
             "png_path":      png_path,
             "png_filename":  png_filename,
+            "png_pending":   png_pending,
             "python_source": python_source,
             "diagram":       diagram,
             "tier":          routed.get("tier", 3),
         }
-        print(json.dumps(output))
-        sys.exit(0)
 
     except Exception as e:
-        print(json.dumps({
+        return {
             "success": False,
             "error":   str(e),
             "title":   "Error",
-        }))
+        }
+
+
+# ═══ Batch mode: independent prompts fan out across cores ═══
+_BATCH_POOL = None
+
+
+def _preload():
+    """Pool initializer: import the pipeline and read the blueprint once per worker."""
+    import diagram_builder  # noqa: F401
+    try:
+        import archgen_slicer  # noqa: F401
+    except ImportError:
+        pass
+    _master_source()
+
+
+def _one(job) -> dict:
+    prompt, output_dir, hi_res = job
+    return handle(prompt, output_dir, hi_res=hi_res)
+
+
+def main_batch(prompts: list, output_dir: str, hi_res: bool = False) -> list:
+    """Run handle() for many prompts in parallel; results keep input order."""
+    global _BATCH_POOL
+    if _BATCH_POOL is None:
+        from concurrent.futures import ProcessPoolExecutor
+        _BATCH_POOL = ProcessPoolExecutor(initializer=_preload)
+    _ensure_dir(output_dir)
+    return list(_BATCH_POOL.map(_one, [(p, output_dir, hi_res) for p in prompts]))
+
+
+def main():
+    hi_res = "--hi-res" in sys.argv
+    if hi_res:
+        sys.argv.remove("--hi-res")
+
+    if len(sys.argv) >= 3 and sys.argv[1] == "--batch":
+        # generate.py --batch <output_dir> [--hi-res]  (one prompt per stdin line)
+        prompts = [line.strip() for line in sys.stdin if line.strip()]
+        _emit(sys.stdout, main_batch(prompts, sys.argv[2], hi_res))
+        sys.exit(0)
+
+    if len(sys.argv) < 3:
+        print(json.dumps({"error": "Usage: generate.py <prompt> <output_dir> [--hi-res]"}))
         sys.exit(1)
 
+    output = handle(sys.argv[1], sys.argv[2], hi_res=hi_res)
+    _emit(sys.stdout, output)
+    sys.exit(0 if output["success"] else 1)
+
+
+def serve():
+    """
+    Long-lived worker (ARCHGEN_WORKER=1): one JSON request per stdin line,
+    {"id", "prompt", "output_dir", "background_png"?, "hi_res"?} → one JSON response
+    per stdout line, echoing "id". Modules and caches stay warm between
+    requests, and background PNG renders keep running after the reply.
+    """
+    # Preload the pipeline so the first request doesn't pay for it
+    import diagram_builder  # noqa: F401
+    try:
+        import archgen_slicer  # noqa: F401
+    except ImportError:
+        pass
+
+    # Anything else printed to stdout would corrupt the response stream
+    out = sys.stdout
+    sys.stdout = sys.stderr
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        req = {}
+        try:
+            req = json.loads(line)
+            resp = handle(req["prompt"], req["output_dir"], req.get("background_png", False),
+                          req.get("hi_res", False))
+        except Exception as e:
+            resp = {"success": False, "error": str(e), "title": "Error"}
+        if "id" in req:
+            resp["id"] = req["id"]
+        _emit(out, resp)
+
 
 if __name__ == "__main__":
-    main()
+    if os.environ.get("ARCHGEN_WORKER"):
+        serve()
+    else:
+        main()
@@ -0,0 +1,101 @@
+"""
+Keep-alive HTTPS for the knowledge base's API calls (Anthropic, Voyage AI).
+
+urllib opens a fresh TCP + TLS connection for every request; the JSON
+payloads here are small enough that the handshake dominates. This keeps one
+persistent connection per (thread, host) and reuses it across calls.
+Payloads are encoded/decoded with orjson when it's installed; embedding
+responses are mostly long float arrays, which it parses far faster.
+
+Usage:
+  from kb_http import request_json
+  result = request_json("https://api.voyageai.com/v1/embeddings", body, headers)
+"""
+
+import http.client
+import json
+import threading
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+
+    json_loads = orjson.loads
+except ImportError:
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    json_loads = json.loads
+
+
+class HTTPError(Exception):
+    """Non-2xx response (mirrors urllib's HTTPError message shape)."""
+
+    def __init__(self, status: int, reason: str, body: bytes):
+        super().__init__(f"HTTP Error {status}: {reason} {body[:300].decode('utf-8', 'replace')}")
+        self.status = status
+        self.body = body
+
+
+# http.client connections aren't thread-safe, so each thread gets its own pool
+_local = threading.local()
+
+# The server may close an idle keep-alive connection; retry those once
+_STALE = (http.client.RemoteDisconnected, http.client.CannotSendRequest,
+          ConnectionResetError, BrokenPipeError)
+
+
+def _connection(host: str, timeout: float) -> http.client.HTTPSConnection:
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(host)
+    if conn is None:
+        conn = conns[host] = http.client.HTTPSConnection(host, timeout=timeout)
+    conn.timeout = timeout
+    if conn.sock is not None:
+        conn.sock.settimeout(timeout)
+    return conn
+
+
+def _drop(host: str):
+    conn = _local.conns.pop(host, None)
+    if conn is not None:
+        conn.close()
+
+
+def request_json(url: str, body: Optional[Dict] = None, headers: Optional[Dict] = None,
+                 timeout: float = 15, raw: bool = False) -> Any:
+    """POST body as JSON (GET without one) → parsed JSON, or bytes with raw=True."""
+    parts = urlsplit(url)
+    path = parts.path + (f"?{parts.query}" if parts.query else "")
+    data = _dumps(body) if body is not None else None
+    hdrs = {"Content-Type": "application/json", **(headers or {})}
+
+    for attempt in (0, 1):
+        conn = _connection(parts.netloc, timeout)
+        try:
+            conn.request("POST" if data is not None else "GET", path, body=data, headers=hdrs)
+            resp = conn.getresponse()
+            payload = resp.read()
+            break
+        except _STALE:
+            _drop(parts.netloc)
+            if attempt:
+                raise
+        except Exception:
+            _drop(parts.netloc)
+            raise
+
+    if resp.will_close:
+        _drop(parts.netloc)
+    if resp.status in (301, 302, 303, 307, 308) and resp.getheader("Location"):
+        return request_json(resp.getheader("Location"), None if resp.status == 303 else body,
+                            headers, timeout, raw)
+    if not 200 <= resp.status < 300:
+        raise HTTPError(resp.status, resp.reason, payload)
+    return payload if raw else json_loads(payload)
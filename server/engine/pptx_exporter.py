@@ -5,16 +5,27 @@ Uses the same output from diagram_builder.build_diagram() so the
 canvas layout and PPTX export are always in sync.
 
 Usage:
-    from pptx_exporter import export_pptx
-    export_pptx(diagram_json, edges, output_path, title=..., subtitle=...)
+    from pptx_exporter import export_pptx, export_pptx_bytes
+    export_pptx(diagram_json, output_path, title=..., subtitle=...)
+    blob = export_pptx_bytes(diagram_json, title=..., subtitle=...)
 """
 
+import pptx
 from pptx import Presentation
-from pptx.util import Inches, Pt, Emu
+from pptx.util import Inches, Pt
 from pptx.dml.color import RGBColor
-from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
-from pptx.enum.shapes import MSO_SHAPE
-import math
+from pptx.oxml import parse_xml
+from pptx.oxml.ns import nsdecls
+from xml.sax.saxutils import escape
+from collections import OrderedDict
+import functools
+import hashlib
+import io
+import json
+import os
+import pathlib
+import threading
+import types
 
 # ═══════════════════════════════════════════════════════════
 # COLOR SYSTEM v2 — SEMANTIC
@@ -70,72 +81,158 @@ C = {
 }
 
 
+@functools.lru_cache(maxsize=64)
 def _rgb(hex_str: str) -> RGBColor:
-    """Convert 6-char hex to RGBColor."""
+    """Convert 6-char hex to RGBColor (memoised; RGBColor is immutable)."""
     h = hex_str.lstrip("#")
     return RGBColor(int(h[0:2], 16), int(h[2:4], 16), int(h[4:6], 16))
 
 
-def _add_rounded_rect(slide, left, top, width, height, fill_hex=None,
-                       line_hex=None, line_width=Pt(1.5), line_dash=None,
-                       transparency=None):
-    """Add a rounded rectangle shape."""
-    shape = slide.shapes.add_shape(
-        MSO_SHAPE.ROUNDED_RECTANGLE, left, top, width, height
+# Palette as RGBColor, so fixed colours are a dict lookup
+RGB = {k: _rgb(v) for k, v in C.items()}
+
+
+# ═══════════════════════════════════════════════════════════
+# RAW DRAWINGML SHAPES
+# ═══════════════════════════════════════════════════════════
+# Every shape on the slide is emitted as <p:sp> / <p:cxnSp> markup and
+# appended straight to the spTree, skipping python-pptx's per-shape proxy
+# objects and property setters. The markup matches what python-pptx's
+# add_shape/add_textbox/add_connector produce once styled. Builders return
+# strings; _shapes() parses a run of them at once.
+
+_NS = nsdecls("a", "p")
+
+_SP_STYLE = (
+    '<p:style><a:lnRef idx="1"><a:schemeClr val="accent1"/></a:lnRef>'
+    '<a:fillRef idx="3"><a:schemeClr val="accent1"/></a:fillRef>'
+    '<a:effectRef idx="2"><a:schemeClr val="accent1"/></a:effectRef>'
+    '<a:fontRef idx="minor"><a:schemeClr val="lt1"/></a:fontRef></p:style>'
+)
+
+_CXN_STYLE = (
+    '<p:style><a:lnRef idx="2"><a:schemeClr val="accent1"/></a:lnRef>'
+    '<a:fillRef idx="0"><a:schemeClr val="accent1"/></a:fillRef>'
+    '<a:effectRef idx="1"><a:schemeClr val="accent1"/></a:effectRef>'
+    '<a:fontRef idx="minor"><a:schemeClr val="tx1"/></a:fontRef></p:style>'
+)
+
+_DASH_XML = '<a:prstDash val="dash"/>'
+
+
+def _shapes(xml: str) -> list:
+    """Parse concatenated shape markup into a list of spTree children."""
+    return list(parse_xml(f'<p:spTree {_NS}>{xml}</p:spTree>'))
+
+
+def _rect_xml(shape_id, left, top, width, height, fill_hex, line_hex=None, line_w=None,
+              dashed=False, no_shadow=False, prst="roundRect", name=None):
+    """
+    Rectangle (rounded by default). No fill when fill_hex is None and no
+    outline when line_hex is None.
+    """
+    if name is None:
+        name = f'{"Rounded Rectangle" if prst == "roundRect" else "Rectangle"} {shape_id - 1}'
+    fill = ('<a:noFill/>' if fill_hex is None else
+            f'<a:solidFill><a:srgbClr val="{fill_hex}"/></a:solidFill>')
+    line = ('<a:ln><a:noFill/></a:ln>' if line_hex is None else
+            f'<a:ln w="{line_w}"><a:solidFill><a:srgbClr val="{line_hex}"/></a:solidFill>'
+            f'{_DASH_XML if dashed else ""}</a:ln>')
+    return (
+        f'<p:sp><p:nvSpPr><p:cNvPr id="{shape_id}" name="{name}"/>'
+        f'<p:cNvSpPr/><p:nvPr/></p:nvSpPr><p:spPr>'
+        f'<a:xfrm><a:off x="{left}" y="{top}"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+        f'<a:prstGeom prst="{prst}"><a:avLst/></a:prstGeom>'
+        f'{fill}{line}'
+        f'{"<a:effectLst/>" if no_shadow else ""}</p:spPr>{_SP_STYLE}'
+        f'<p:txBody><a:bodyPr rtlCol="0" anchor="ctr"/><a:lstStyle/>'
+        f'<a:p><a:pPr algn="ctr"/></a:p></p:txBody></p:sp>'
     )
-    shape.rotation = 0
-    # Fill
-    if fill_hex:
-        shape.fill.solid()
-        shape.fill.fore_color.rgb = _rgb(fill_hex)
-        if transparency is not None:
-            # python-pptx doesn't directly support fill transparency easily,
-            # so we use a very light color instead
-            pass
-    else:
-        shape.fill.background()
-    # Line
-    if line_hex:
-        shape.line.color.rgb = _rgb(line_hex)
-        shape.line.width = line_width
-        if line_dash:
-            shape.line.dash_style = line_dash
-    else:
-        shape.line.fill.background()
-    return shape
-
-
-def _add_text_box(slide, left, top, width, height, text,
-                   font_size=10, bold=False, color="1E293B",
-                   font_name="Calibri", alignment=PP_ALIGN.LEFT,
-                   valign=MSO_ANCHOR.TOP):
-    """Add a text box with formatted text."""
-    txBox = slide.shapes.add_textbox(left, top, width, height)
-    tf = txBox.text_frame
-    tf.word_wrap = True
-    p = tf.paragraphs[0]
-    p.text = text
-    p.font.size = Pt(font_size)
-    p.font.bold = bold
-    p.font.color.rgb = _rgb(color)
-    p.font.name = font_name
-    p.alignment = alignment
-    tf.auto_size = None
-    return txBox
-
-
-def _add_line(slide, x1, y1, x2, y2, color_hex, width=Pt(1.5), dash=None):
-    """Add a connector line."""
-    connector = slide.shapes.add_connector(
-        1,  # straight connector
-        Inches(x1), Inches(y1),
-        Inches(x2), Inches(y2)
+
+
+def _run(text, font_size, bold, color, font_name="Calibri"):
+    """One centered paragraph holding a single formatted run (text pre-escaped)."""
+    return (
+        f'<a:p><a:pPr algn="ctr"/><a:r>'
+        f'<a:rPr lang="en-US" sz="{Pt(font_size).centipoints}" b="{int(bold)}" dirty="0">'
+        f'<a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+        f'<a:latin typeface="{font_name}"/></a:rPr>'
+        f'<a:t>{text}</a:t></a:r></a:p>'
+    )
+
+
+def _card_xml(shape_id, left, top, border_hex, emoji, name, sub):
+    """
+    Node card: white rounded rectangle whose own text frame carries the
+    emoji, name and subtitle as three paragraphs (one shape per node).
+    """
+    return (
+        f'<p:sp><p:nvSpPr>'
+        f'<p:cNvPr id="{shape_id}" name="Rounded Rectangle {shape_id - 1}"/>'
+        f'<p:cNvSpPr/><p:nvPr/></p:nvSpPr><p:spPr>'
+        f'<a:xfrm><a:off x="{left}" y="{top}"/><a:ext cx="{CARD_W_EMU}" cy="{CARD_H_EMU}"/></a:xfrm>'
+        f'<a:prstGeom prst="roundRect"><a:avLst/></a:prstGeom>'
+        f'<a:solidFill><a:srgbClr val="{C["white"]}"/></a:solidFill>'
+        f'<a:ln w="{Pt(1.2)}"><a:solidFill><a:srgbClr val="{border_hex}"/></a:solidFill></a:ln>'
+        f'<a:effectLst/></p:spPr>{_SP_STYLE}'
+        f'<p:txBody><a:bodyPr wrap="square" lIns="0" tIns="{CARD_PAD_EMU}" rIns="0" bIns="0" '
+        f'rtlCol="0" anchor="t"/><a:lstStyle/>'
+        f'{_run(emoji, 14, False, C["text"])}'
+        f'{_run(name, 7, True, C["text"])}'
+        f'{_run(sub, 5.5, False, C["muted"])}'
+        f'</p:txBody></p:sp>'
+    )
+
+
+# Single-paragraph text box; every zone label, edge label and chrome caption
+# differs only in these fields
+_TB_XML = (
+    '<p:sp><p:nvSpPr><p:cNvPr id="{id}" name="{name}"/>'
+    '<p:cNvSpPr txBox="1"/><p:nvPr/></p:nvSpPr><p:spPr>'
+    '<a:xfrm><a:off x="{left}" y="{top}"/><a:ext cx="{width}" cy="{height}"/></a:xfrm>'
+    '<a:prstGeom prst="rect"><a:avLst/></a:prstGeom><a:noFill/></p:spPr>'
+    '<p:txBody><a:bodyPr wrap="square"/><a:lstStyle/><a:p><a:pPr algn="{algn}">'
+    '<a:defRPr sz="{sz}" b="{b}"><a:solidFill><a:srgbClr val="{color}"/></a:solidFill>'
+    '<a:latin typeface="{font}"/></a:defRPr></a:pPr>'
+    '<a:r><a:t>{text}</a:t></a:r></a:p></p:txBody></p:sp>'
+)
+
+
+def _text_xml(shape_id, left, top, width, height, text, font_size, bold=False,
+              color="1E293B", font_name="Calibri", algn="l", name=None):
+    """Word-wrapped text box; text must already be XML-escaped."""
+    return _TB_XML.format(
+        id=shape_id, name=name or f"TextBox {shape_id - 1}",
+        left=left, top=top, width=width, height=height, algn=algn,
+        sz=Pt(font_size).centipoints, b=int(bold), color=color, font=font_name,
+        text=text,
+    )
+
+
+def _prep_label(s: str, maxlen: int = 14) -> str:
+    """
+    Edge label as it goes into the markup: trimmed, cut to what the fixed
+    label box shows, and XML-escaped.
+    """
+    s = (s or "").strip()
+    if len(s) > maxlen:
+        s = s[:maxlen - 1].rstrip() + "…"
+    return escape(s)
+
+
+def _line_xml(shape_id, x1, y1, x2, y2, color_hex, line_w, dashed=False, name=None):
+    """Straight connector from (x1, y1) to (x2, y2)."""
+    flip = ('' if x2 >= x1 else ' flipH="1"') + ('' if y2 >= y1 else ' flipV="1"')
+    return (
+        f'<p:cxnSp><p:nvCxnSpPr>'
+        f'<p:cNvPr id="{shape_id}" name="{name or f"Connector {shape_id - 1}"}"/>'
+        f'<p:cNvCxnSpPr/><p:nvPr/></p:nvCxnSpPr><p:spPr>'
+        f'<a:xfrm{flip}><a:off x="{min(x1, x2)}" y="{min(y1, y2)}"/>'
+        f'<a:ext cx="{abs(x2 - x1)}" cy="{abs(y2 - y1)}"/></a:xfrm>'
+        f'<a:prstGeom prst="line"><a:avLst/></a:prstGeom>'
+        f'<a:ln w="{line_w}"><a:solidFill><a:srgbClr val="{color_hex}"/></a:solidFill>'
+        f'{_DASH_XML if dashed else ""}</a:ln></p:spPr>{_CXN_STYLE}</p:cxnSp>'
     )
-    connector.line.color.rgb = _rgb(color_hex)
-    connector.line.width = width
-    if dash:
-        connector.line.dash_style = dash
-    return connector
 
 
 # ═══════════════════════════════════════════════════════════
@@ -170,6 +267,9 @@ NODE_BORDER_OVERRIDES = {
     "dataproc":     C["processing"],
 }
 
+# Edge types drawn with a dashed line
+_DASHED_EDGE_TYPES = frozenset(("control", "observe", "obsInt", "obsExt", "alert"))
+
 # Edge type → color
 EDGE_TYPE_COLORS = {
     "data":     C["eData"],
@@ -222,6 +322,18 @@ def _sh(v):
 CARD_W = 0.85
 CARD_H = 0.58
 
+EMU_PER_INCH = 914400
+
+
+def _emu(v):
+    """Inches → integer EMU (same rounding as pptx.util.Inches)."""
+    return int(v * EMU_PER_INCH)
+
+
+CARD_W_EMU = _emu(CARD_W)
+CARD_H_EMU = _emu(CARD_H)
+CARD_PAD_EMU = _emu(0.02)  # gap above the emoji row
+
 
 # ═══════════════════════════════════════════════════════════
 # ZONE DEFINITIONS (matching the React mockup)
@@ -250,23 +362,18 @@ ZONES = [
 # NODE POSITIONS (matching React mockup SVG coords)
 # ═══════════════════════════════════════════════════════════
 
-# id → (svg_x, svg_y, name, subtitle, group, emoji)
+# id → (svg_x, svg_y, name, subtitle, group, emoji), one entry per product;
+# short ids used by older diagrams resolve through _ALIASES
 NODE_POSITIONS = {
     "analysts":    (880, 60,   "Analysts",     "BI Users",       "consumer",  "👤"),
     "executives":  (1060, 60,  "Executives",   "C-suite",        "consumer",  "👔"),
-    "oracle":      (70, 560,   "Oracle DB",    "On-prem CDC",    "source",    "🔴"),
     "oracle_db":   (70, 560,   "Oracle DB",    "On-prem CDC",    "source",    "🔴"),
-    "entra":       (70, 280,   "Entra ID",     "SSO / OIDC",     "ext-id",    "🔷"),
     "entra_id":    (70, 280,   "Entra ID",     "SSO / OIDC",     "ext-id",    "🔷"),
     "cyberark":    (70, 420,   "CyberArk",     "PAM Vault",      "ext-id",    "🔐"),
-    "iam":         (460, 270,  "Cloud IAM",    "Identity",       "gcp-sec",   "🛡️"),
     "cloud_iam":   (460, 270,  "Cloud IAM",    "Identity",       "gcp-sec",   "🛡️"),
-    "kms":         (460, 410,  "Cloud KMS",    "CMEK",           "gcp-sec",   "🔑"),
     "cloud_kms":   (460, 410,  "Cloud KMS",    "CMEK",           "gcp-sec",   "🔑"),
-    "secret":      (460, 550,  "Secret Mgr",   "Credentials",    "gcp-sec",   "🗝️"),
     "secret_manager":(460,550, "Secret Mgr",   "Credentials",    "gcp-sec",   "🗝️"),
     "vpc":         (460, 690,  "VPC",          "Private Net",    "gcp-sec",   "🌐"),
-    "vpcsc":       (460, 830,  "VPC-SC",       "Perimeter",      "gcp-sec",   "🛡️"),
     "vpc_sc":      (460, 830,  "VPC-SC",       "Perimeter",      "gcp-sec",   "🛡️"),
     "datastream":  (660, 880,  "Datastream",   "CDC Stream",     "pipeline",  "⚡"),
     "gcs":         (660, 680,  "GCS Raw",      "Landing Zone",   "pipeline",  "📦"),
@@ -279,23 +386,14 @@ NODE_POSITIONS = {
     "silver":      (830, 430,  "Silver",       "Cleaned",        "medallion", "🥈"),
     "gold":        (1000, 430, "Gold",         "Curated",        "medallion", "🥇"),
     "looker":      (660, 250,  "Looker",       "Governed BI",    "serving",   "📊"),
-    "vertex":      (1100, 530, "Vertex AI",    "ML Platform",    "serving",   "🤖"),
     "vertex_ai":   (1100, 530, "Vertex AI",    "ML Platform",    "serving",   "🤖"),
-    "composer":    (660, 370,  "Composer",     "Airflow DAGs",   "orch",      "🎼"),
     "cloud_composer":(660,370, "Composer",     "Airflow DAGs",   "orch",      "🎼"),
-    "monitoring":  (1100, 680, "Monitoring",   "Metrics",        "obs",       "📈"),
     "cloud_monitoring":(1100,680,"Monitoring",  "Metrics",        "obs",       "📈"),
-    "logging":     (1100, 830, "Logging",      "Centralized",    "obs",       "📋"),
     "cloud_logging":(1100,830, "Logging",      "Centralized",    "obs",       "📋"),
-    "audit":       (1280, 830, "Audit Logs",   "Compliance",     "obs",       "📝"),
     "audit_logs":  (1280, 830, "Audit Logs",   "Compliance",     "obs",       "📝"),
-    "pagerduty":   (880, 1110, "PagerDuty",    "Incidents",      "ext-alert", "🚨"),
     "pagerduty_inc":(880,1110, "PagerDuty",    "Incidents",      "ext-alert", "🚨"),
-    "wiz":         (1100, 1110,"Wiz CSPM",     "Cloud Security", "ext-alert", "🔒"),
     "wiz_cspm":    (1100,1110, "Wiz CSPM",     "Cloud Security", "ext-alert", "🔒"),
-    "splunk":      (460, 1110, "Splunk SIEM",  "Log Analytics",  "ext-log",   "📡"),
     "splunk_siem": (460, 1110, "Splunk SIEM",  "Log Analytics",  "ext-log",   "📡"),
-    "dynatrace":   (660, 1110, "Dynatrace",    "APM Traces",     "ext-log",   "🔬"),
     "dynatrace_apm":(660,1110, "Dynatrace",    "APM Traces",     "ext-log",   "🔬"),
     # Additional products that might appear
     "pubsub":      (660, 780,  "Pub/Sub",      "Message Bus",    "pipeline",  "📨"),
@@ -315,11 +413,199 @@ NODE_POSITIONS = {
     "cloud_armor": (460, 340,  "Cloud Armor",  "WAF / DDoS",     "gcp-sec",   "🛡️"),
 }
 
+_ALIASES = {
+    "oracle":     "oracle_db",
+    "entra":      "entra_id",
+    "iam":        "cloud_iam",
+    "kms":        "cloud_kms",
+    "secret":     "secret_manager",
+    "vpcsc":      "vpc_sc",
+    "vertex":     "vertex_ai",
+    "composer":   "cloud_composer",
+    "monitoring": "cloud_monitoring",
+    "logging":    "cloud_logging",
+    "audit":      "audit_logs",
+    "pagerduty":  "pagerduty_inc",
+    "wiz":        "wiz_cspm",
+    "splunk":     "splunk_siem",
+    "dynatrace":  "dynatrace_apm",
+}
+
+
+def _resolve(nid: str) -> str:
+    """Canonical NODE_POSITIONS id for a node id."""
+    return _ALIASES.get(nid, nid)
+
+
+# Layout and colours are fixed, so each card is resolved once at import:
+# id → (left EMU, top EMU, name, subtitle, emoji, border hex), text XML-escaped
+NODE_META = types.MappingProxyType({
+    _nid: (_emu(_sx(_x)), _emu(_sy(_y)), escape(_name), escape(_sub), escape(_emoji),
+           NODE_BORDER_OVERRIDES.get(_nid) or GROUP_COLORS.get(_grp, C["muted"]))
+    for _nid, (_x, _y, _name, _sub, _grp, _emoji) in NODE_POSITIONS.items()
+})
+
+# id → card center (x, y) in inches, then the same point in EMU (edge endpoints)
+NODE_CENTERS = {}
+for _nid, (_x, _y, *_rest) in NODE_POSITIONS.items():
+    _cx, _cy = _sx(_x) + CARD_W / 2, _sy(_y) + CARD_H / 2
+    NODE_CENTERS[_nid] = (_cx, _cy, _emu(_cx), _emu(_cy))
+
+# Zones are fixed too: box (left, top, width, height) and label box
+# (left, top, width) in EMU, escaped label, color, dashed, filled
+_ZONE_LABEL_H = _emu(0.2)
+_ZONES_EMU = tuple(
+    (_emu(_sx(_zx)), _emu(_sy(_zy)), _emu(_sw(_zw)), _emu(_sh(_zh)),
+     _emu(_sx(_zx) + 0.08), _emu(_sy(_zy) - 0.05), _emu(len(_zlabel) * 0.065 + 0.3),
+     escape(_zlabel), _zcolor, _zdashed, _zfilled)
+    for (_zx, _zy, _zw, _zh, _zlabel, _zcolor, _zdashed, _zfilled) in ZONES
+)
+
+
+# ═══════════════════════════════════════════════════════════
+# SLIDE CHROME (header, footer, legend)
+# ═══════════════════════════════════════════════════════════
+# Identical on every slide apart from four strings, so the markup is built
+# once here; export_pptx fills in {title}, {subtitle}, {nodes} and {edges}
+# and renumbers the shape ids.
+
+LEGEND_ITEMS = [
+    (C["eData"],     "Data Flow",     False),
+    (C["eIdentity"], "Identity",      True),
+    (C["eControl"],  "Orchestration", True),
+    (C["gcpObs"],    "Observability", True),
+    (C["eAlert"],    "Alerting",      True),
+    (C["eObsExt"],   "Ext Logging",   True),
+]
+
+
+def _chrome_template() -> str:
+    footer_y = _emu(SLIDE_H - FOOTER_H + 0.1)
+    parts = [
+        _rect_xml(0, 0, 0, _emu(SLIDE_W), _emu(HEADER_H), C["navy"],
+                  prst="rect", name="Header"),
+        _text_xml(0, _emu(0.4), _emu(0.1), _emu(8), _emu(0.4), "{title}",
+                  20, bold=True, color=C["white"], name="Title"),
+        _text_xml(0, _emu(0.4), _emu(0.42), _emu(8), _emu(0.25), "{subtitle}",
+                  9, color="94A3B8", name="Subtitle"),
+        _text_xml(0, _emu(SLIDE_W - 2), _emu(0.15), _emu(1.6), _emu(0.4), "ArchGen",
+                  13, bold=True, color=C["white"], algn="r", name="Brand"),
+        _rect_xml(0, 0, _emu(SLIDE_H - FOOTER_H), _emu(SLIDE_W), _emu(FOOTER_H), C["navy"],
+                  prst="rect", name="Footer"),
+        _text_xml(0, _emu(0.4), footer_y, _emu(6), _emu(0.3),
+                  "Generated by ArchGen — Enterprise Architecture Intelligence",
+                  8, color="94A3B8", name="Footer Note"),
+        _text_xml(0, _emu(8), footer_y, _emu(5), _emu(0.3),
+                  "{nodes} products · {edges} connections    CONFIDENTIAL",
+                  8, color="64748B", font_name="Consolas", algn="r", name="Footer Stats"),
+    ]
+    leg_x = SLIDE_W - 1.8
+    leg_y = CONTENT_TOP + 0.1
+    for i, (lc, ll, ld) in enumerate(LEGEND_ITEMS):
+        ly = leg_y + i * 0.2
+        parts.append(_line_xml(0, _emu(leg_x), _emu(ly + 0.06), _emu(leg_x + 0.3),
+                               _emu(ly + 0.06), lc, Pt(1.5), ld, name=f"Legend {ll} Line"))
+        parts.append(_text_xml(0, _emu(leg_x + 0.35), _emu(ly - 0.02), _emu(1.2), _emu(0.18),
+                               escape(ll), 6.5, bold=True, color=lc, name=f"Legend {ll}"))
+    return "".join(parts)
+
+
+_CHROME_TEMPLATE = _chrome_template()
+
+
+# ═══════════════════════════════════════════════════════════
+# NODE / EDGE EMISSION
+# ═══════════════════════════════════════════════════════════
+
+def _emit_nodes(parts: list, nodes: list, node_centers: dict, shape_id: int) -> int:
+    """
+    Add card markup to parts per placeable node and record its center in
+    node_centers. Returns the next free shape id.
+    """
+    # Bound once: the loop body is all lookups and calls
+    append = parts.append
+    node_meta = NODE_META.get
+
+    for node in nodes:
+        nid = node["id"]
+        canon = _resolve(nid)
+        meta = node_meta(canon)
+        if not meta:
+            continue
+
+        left, top, name, sub, emoji, border_color = meta
+
+        # Store center for edge drawing
+        node_centers[nid] = NODE_CENTERS[canon]
+
+        append(_card_xml(shape_id, left, top, border_color, emoji, name, sub))
+        shape_id += 1
+    return shape_id
+
+
+def _emit_edges(parts: list, edges: list, node_centers: dict, shape_id: int) -> int:
+    """
+    Add connector (plus label) markup to parts per edge whose ends were both
+    drawn. Returns the next free shape id.
+    """
+    append = parts.append
+    edge_color = EDGE_TYPE_COLORS.get
+    default_color = C["eData"]
+    white = C["white"]
+    data_w, other_w, label_line_w = Pt(2), Pt(1.2), Pt(0.5)
+    label_w, label_h = Inches(0.44), Inches(0.14)
+
+    # Keep only edges whose ends were both drawn, flattened to plain tuples.
+    # "from"/"to" are required on every DiagEdge; the rest are optional.
+    # Repeats of the same (from, to, label) and edges between two nodes drawn
+    # at the same spot (aliases of one product) would only add invisible
+    # shapes, so they're dropped here.
+    centers = node_centers.get
+    drawable = []
+    seen = set()
+    for edge in edges:
+        fid, tid = edge["from"], edge["to"]
+        src = centers(fid)
+        dst = centers(tid)
+        if not (src and dst) or (src[2] == dst[2] and src[3] == dst[3]):
+            continue
+        label = _prep_label(edge.get("label"))
+        key = (fid, tid, label)
+        if key in seen:
+            continue
+        seen.add(key)
+        drawable.append((src, dst, edge.get("edgeType", "data"), label))
+
+    for (fx, fy, fx_emu, fy_emu), (tx, ty, tx_emu, ty_emu), etype, label in drawable:
+        color = edge_color(etype, default_color)
+        dashed = etype in _DASHED_EDGE_TYPES
+
+        append(_line_xml(shape_id, fx_emu, fy_emu, tx_emu, ty_emu, color,
+                         data_w if etype == "data" else other_w, dashed))
+        shape_id += 1
+
+        # Edge label
+        if label:
+            mx = (fx + tx) / 2
+            my_val = (fy + ty) / 2
+            lx, ly = Inches(mx - 0.22), Inches(my_val - 0.07)
+            # Label background
+            append(_rect_xml(shape_id, lx, ly, label_w, label_h, white, color, label_line_w))
+            append(_text_xml(shape_id + 1, lx, ly, label_w, label_h, label, 5, bold=True,
+                             color=color, font_name="Consolas", algn="ctr"))
+            shape_id += 2
+    return shape_id
+
 
 # ═══════════════════════════════════════════════════════════
 # MAIN EXPORT FUNCTION
 # ═══════════════════════════════════════════════════════════
 
+# python-pptx's blank template, read once; each export opens it from memory
+# instead of re-reading the file
+_TEMPLATE_BYTES = (pathlib.Path(pptx.__file__).parent / "templates" / "default.pptx").read_bytes()
+
+
 def export_pptx(diagram: dict, output_path: str,
                 title: str = "Data Pipeline Architecture",
                 subtitle: str = "Generated by ArchGen"):
@@ -328,11 +614,57 @@ def export_pptx(diagram: dict, output_path: str,
 
     Args:
         diagram: dict with 'nodes', 'edges', 'title', 'subtitle'
-        output_path: where to save the .pptx file
+        output_path: where to save the .pptx file (path or writable file object)
         title: header title
         subtitle: header subtitle
     """
-    prs = Presentation()
+    blob = export_pptx_bytes(diagram, title, subtitle)
+    if hasattr(output_path, "write"):
+        output_path.write(blob)
+    else:
+        with open(output_path, "wb") as f:
+            f.write(blob)
+    return output_path
+
+
+def export_pptx_bytes(diagram: dict,
+                      title: str = "Data Pipeline Architecture",
+                      subtitle: str = "Generated by ArchGen") -> bytes:
+    """
+    Render a Diagram JSON to .pptx file contents without touching disk.
+
+    A server can return the bytes directly, or hand the write to another
+    thread (e.g. asyncio.to_thread(Path(p).write_bytes, blob)) so the
+    request doesn't block on it. Recently exported diagrams are cached by
+    their nodes and edges; a re-export under a new title only rewrites the
+    header text.
+    """
+    key = _diagram_key(diagram)
+    with _EXPORT_CACHE_LOCK:
+        hit = _EXPORT_CACHE.get(key)
+        if hit is not None:
+            _EXPORT_CACHE.move_to_end(key)
+
+    if hit is not None:
+        blob, cached_title, cached_subtitle = hit
+        if (cached_title, cached_subtitle) == (title, subtitle):
+            return blob
+        blob = _retitle(blob, title, subtitle)
+    else:
+        blob = _render(diagram, title, subtitle)
+
+    if EXPORT_CACHE_MAX > 0:
+        with _EXPORT_CACHE_LOCK:
+            _EXPORT_CACHE[key] = (blob, title, subtitle)
+            _EXPORT_CACHE.move_to_end(key)
+            if len(_EXPORT_CACHE) > EXPORT_CACHE_MAX:
+                _EXPORT_CACHE.popitem(last=False)
+    return blob
+
+
+def _render(diagram: dict, title: str, subtitle: str) -> bytes:
+    """Build the slide from scratch (export_pptx_bytes minus the cache)."""
+    prs = Presentation(io.BytesIO(_TEMPLATE_BYTES))
     prs.slide_width = Inches(SLIDE_W)
     prs.slide_height = Inches(SLIDE_H)
 
@@ -343,226 +675,88 @@ def export_pptx(diagram: dict, output_path: str,
     bg = slide.background
     fill = bg.fill
     fill.solid()
-    fill.fore_color.rgb = _rgb(C["bg"])
+    fill.fore_color.rgb = RGB["bg"]
 
-    # ── HEADER BAR ──
-    hdr = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, Inches(0), Inches(0),
-        Inches(SLIDE_W), Inches(HEADER_H)
-    )
-    hdr.fill.solid()
-    hdr.fill.fore_color.rgb = _rgb(C["navy"])
-    hdr.line.fill.background()
-
-    _add_text_box(slide, Inches(0.4), Inches(0.1), Inches(8), Inches(0.4),
-                  title, font_size=20, bold=True, color=C["white"])
-    _add_text_box(slide, Inches(0.4), Inches(0.42), Inches(8), Inches(0.25),
-                  subtitle, font_size=9, color="94A3B8")
-    _add_text_box(slide, Inches(SLIDE_W - 2), Inches(0.15), Inches(1.6), Inches(0.4),
-                  "ArchGen", font_size=13, bold=True, color=C["white"],
-                  alignment=PP_ALIGN.RIGHT)
-
-    # ── FOOTER BAR ──
-    ftr = slide.shapes.add_shape(
-        MSO_SHAPE.RECTANGLE, Inches(0), Inches(SLIDE_H - FOOTER_H),
-        Inches(SLIDE_W), Inches(FOOTER_H)
-    )
-    ftr.fill.solid()
-    ftr.fill.fore_color.rgb = _rgb(C["navy"])
-    ftr.line.fill.background()
-
-    node_count = len(diagram.get("nodes", []))
-    edge_count = len(diagram.get("edges", []))
-
-    _add_text_box(slide, Inches(0.4), Inches(SLIDE_H - FOOTER_H + 0.1),
-                  Inches(6), Inches(0.3),
-                  f"Generated by ArchGen — Enterprise Architecture Intelligence",
-                  font_size=8, color="94A3B8")
-    _add_text_box(slide, Inches(8), Inches(SLIDE_H - FOOTER_H + 0.1),
-                  Inches(5), Inches(0.3),
-                  f"{node_count} products · {edge_count} connections    CONFIDENTIAL",
-                  font_size=8, color="64748B", font_name="Consolas",
-                  alignment=PP_ALIGN.RIGHT)
+    # Every shape below is built as markup, then parsed and appended in one go
+    spTree = slide.shapes._spTree
+    first_id = shape_id = spTree.max_shape_id + 1
+    parts = []
 
     # ── ZONE BOXES ──
-    from pptx.enum.dml import MSO_LINE_DASH_STYLE
-    for (zx, zy, zw, zh, zlabel, zcolor, zdashed, zfilled) in ZONES:
-        shape = slide.shapes.add_shape(
-            MSO_SHAPE.ROUNDED_RECTANGLE,
-            Inches(_sx(zx)), Inches(_sy(zy)),
-            Inches(_sw(zw)), Inches(_sh(zh))
-        )
-        if zfilled:
-            shape.fill.solid()
-            shape.fill.fore_color.rgb = _rgb(zcolor)
-            # Make very transparent — lighten the color
-            shape.fill.fore_color.rgb = _rgb(zcolor)
-        else:
-            shape.fill.background()
-
-        shape.line.color.rgb = _rgb(zcolor)
-        shape.line.width = Pt(1.8)
-        if zdashed:
-            shape.line.dash_style = MSO_LINE_DASH_STYLE.DASH
-
+    zone_line_w = Pt(1.8)
+    for (zl, zt, zw, zh, ll, lt, lw, zlabel, zcolor, zdashed, zfilled) in _ZONES_EMU:
+        parts.append(_rect_xml(shape_id, zl, zt, zw, zh, zcolor if zfilled else None,
+                               zcolor, zone_line_w, dashed=zdashed))
         # Zone label
-        _add_text_box(
-            slide,
-            Inches(_sx(zx) + 0.08), Inches(_sy(zy) - 0.05),
-            Inches(len(zlabel) * 0.065 + 0.3), Inches(0.2),
-            zlabel, font_size=7, bold=True, color=zcolor
-        )
+        parts.append(_text_xml(shape_id + 1, ll, lt, lw, _ZONE_LABEL_H,
+                               zlabel, 7, bold=True, color=zcolor))
+        shape_id += 2
 
     # ── NODES ──
-    nodes = diagram.get("nodes", [])
-    node_centers = {}  # id → (center_x_inches, center_y_inches)
+    node_centers = {}  # id → (center_x, center_y, center_x_emu, center_y_emu)
+    shape_id = _emit_nodes(parts, diagram.get("nodes", []), node_centers, shape_id)
 
-    for node in nodes:
-        nid = node["id"]
-        pos = NODE_POSITIONS.get(nid)
-        if not pos:
-            continue
+    # ── EDGES ──
+    shape_id = _emit_edges(parts, diagram.get("edges", []), node_centers, shape_id)
 
-        svg_x, svg_y, name, sub, grp, emoji = pos
-        border_color = NODE_BORDER_OVERRIDES.get(nid, GROUP_COLORS.get(grp, C["muted"]))
+    # ── VPN LABEL ──
+    if "oracle_db" in node_centers or "oracle" in node_centers:
+        oid = "oracle_db" if "oracle_db" in node_centers else "oracle"
+        oy = node_centers[oid][1]
+        vx, vy, vw, vh = Inches(_sx(250)), Inches(oy - 0.07), Inches(0.6), Inches(0.16)
+        parts.append(_rect_xml(shape_id, vx, vy, vw, vh, C["white"], C["source"], Pt(1)))
+        parts.append(_text_xml(shape_id + 1, vx, vy, vw, vh, "VPN / DIA", 6, bold=True,
+                               color=C["source"], font_name="Consolas", algn="ctr"))
+        shape_id += 2
+
+    # ── HEADER / FOOTER / LEGEND ──
+    # Drawn last: nothing overlaps the bars, and the legend sits above the zones
+    parts.append(_CHROME_TEMPLATE.format(
+        title=escape(title), subtitle=escape(subtitle),
+        nodes=len(diagram.get("nodes", [])), edges=len(diagram.get("edges", [])),
+    ))
+
+    shapes = _shapes("".join(parts))
+    for chrome_id, sp in enumerate(shapes[shape_id - first_id:], shape_id):
+        sp[0][0].set("id", str(chrome_id))  # nvSpPr/cNvPr
+    spTree.extend(shapes)
 
-        px = _sx(svg_x)
-        py = _sy(svg_y)
+    # ── SAVE ──
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
 
-        # Store center for edge drawing
-        node_centers[nid] = (px + CARD_W / 2, py + CARD_H / 2)
-
-        # Card background
-        card = slide.shapes.add_shape(
-            MSO_SHAPE.ROUNDED_RECTANGLE,
-            Inches(px), Inches(py),
-            Inches(CARD_W), Inches(CARD_H)
-        )
-        card.fill.solid()
-        card.fill.fore_color.rgb = _rgb(C["white"])
-        card.line.color.rgb = _rgb(border_color)
-        card.line.width = Pt(1.2)
-        # Shadow
-        card.shadow.inherit = False
-
-        # Emoji
-        _add_text_box(slide, Inches(px), Inches(py + 0.02),
-                      Inches(CARD_W), Inches(0.22),
-                      emoji, font_size=14, alignment=PP_ALIGN.CENTER)
-
-        # Name
-        _add_text_box(slide, Inches(px), Inches(py + 0.24),
-                      Inches(CARD_W), Inches(0.18),
-                      name, font_size=7, bold=True, color=C["text"],
-                      alignment=PP_ALIGN.CENTER)
-
-        # Subtitle
-        _add_text_box(slide, Inches(px), Inches(py + 0.40),
-                      Inches(CARD_W), Inches(0.15),
-                      sub, font_size=5.5, color=C["muted"],
-                      alignment=PP_ALIGN.CENTER)
 
-    # ── EDGES ──
-    from pptx.enum.dml import MSO_LINE_DASH_STYLE
-    edges = diagram.get("edges", [])
-    for edge in edges:
-        fid = edge.get("from", "")
-        tid = edge.get("to", "")
-        if fid not in node_centers or tid not in node_centers:
-            continue
+# ═══════════════════════════════════════════════════════════
+# EXPORT CACHE
+# ═══════════════════════════════════════════════════════════
+# The slide depends only on the diagram's nodes and edges plus the two
+# header strings, so users re-exporting the same diagram under another
+# title get the cached file with just the Title/Subtitle runs rewritten.
 
-        etype = edge.get("edgeType", "data")
-        color = EDGE_TYPE_COLORS.get(etype, C["eData"])
-        dashed = etype in ("control", "observe", "obsInt", "obsExt", "alert")
+EXPORT_CACHE_MAX = int(os.environ.get("ARCHGEN_PPTX_CACHE_MAX", "32"))
 
-        fx, fy = node_centers[fid]
-        tx, ty = node_centers[tid]
+_EXPORT_CACHE = OrderedDict()  # digest → (pptx bytes, title, subtitle)
+_EXPORT_CACHE_LOCK = threading.Lock()
 
-        conn = slide.shapes.add_connector(
-            1,  # straight
-            Inches(fx), Inches(fy),
-            Inches(tx), Inches(ty)
-        )
-        conn.line.color.rgb = _rgb(color)
-        conn.line.width = Pt(2) if etype == "data" else Pt(1.2)
-        if dashed:
-            conn.line.dash_style = MSO_LINE_DASH_STYLE.DASH
 
-        # Edge label
-        label = edge.get("label", "")
-        if label:
-            mx = (fx + tx) / 2
-            my_val = (fy + ty) / 2
-            # Label background
-            lbl_shape = slide.shapes.add_shape(
-                MSO_SHAPE.ROUNDED_RECTANGLE,
-                Inches(mx - 0.22), Inches(my_val - 0.07),
-                Inches(0.44), Inches(0.14)
-            )
-            lbl_shape.fill.solid()
-            lbl_shape.fill.fore_color.rgb = _rgb(C["white"])
-            lbl_shape.line.color.rgb = _rgb(color)
-            lbl_shape.line.width = Pt(0.5)
-
-            _add_text_box(
-                slide,
-                Inches(mx - 0.22), Inches(my_val - 0.07),
-                Inches(0.44), Inches(0.14),
-                label, font_size=5, bold=True, color=color,
-                font_name="Consolas", alignment=PP_ALIGN.CENTER
-            )
+def _diagram_key(diagram: dict) -> bytes:
+    """Digest of everything in the diagram that affects the slide."""
+    canon = json.dumps([diagram.get("nodes", []), diagram.get("edges", [])],
+                       sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.blake2b(canon.encode(), digest_size=16).digest()
 
-    # ── VPN LABEL ──
-    if "oracle_db" in node_centers or "oracle" in node_centers:
-        oid = "oracle_db" if "oracle_db" in node_centers else "oracle"
-        _, oy = node_centers[oid]
-        vpn_shape = slide.shapes.add_shape(
-            MSO_SHAPE.ROUNDED_RECTANGLE,
-            Inches(_sx(250)), Inches(oy - 0.07),
-            Inches(0.6), Inches(0.16)
-        )
-        vpn_shape.fill.solid()
-        vpn_shape.fill.fore_color.rgb = _rgb(C["white"])
-        vpn_shape.line.color.rgb = _rgb(C["source"])
-        vpn_shape.line.width = Pt(1)
-
-        _add_text_box(
-            slide, Inches(_sx(250)), Inches(oy - 0.07),
-            Inches(0.6), Inches(0.16),
-            "VPN / DIA", font_size=6, bold=True, color=C["source"],
-            font_name="Consolas", alignment=PP_ALIGN.CENTER
-        )
-
-    # ── LEGEND ──
-    legend_items = [
-        (C["eData"],     "Data Flow",     False),
-        (C["eIdentity"], "Identity",      True),
-        (C["eControl"],  "Orchestration", True),
-        (C["gcpObs"],    "Observability", True),
-        (C["eAlert"],    "Alerting",      True),
-        (C["eObsExt"],   "Ext Logging",   True),
-    ]
-    leg_x = SLIDE_W - 1.8
-    leg_y = CONTENT_TOP + 0.1
-    for i, (lc, ll, ld) in enumerate(legend_items):
-        ly = leg_y + i * 0.2
-        line = slide.shapes.add_connector(
-            1,
-            Inches(leg_x), Inches(ly + 0.06),
-            Inches(leg_x + 0.3), Inches(ly + 0.06)
-        )
-        line.line.color.rgb = _rgb(lc)
-        line.line.width = Pt(1.5)
-        if ld:
-            line.line.dash_style = MSO_LINE_DASH_STYLE.DASH
-
-        _add_text_box(slide, Inches(leg_x + 0.35), Inches(ly - 0.02),
-                      Inches(1.2), Inches(0.18),
-                      ll, font_size=6.5, bold=True, color=lc)
 
-    # ── SAVE ──
-    prs.save(output_path)
-    return output_path
+def _retitle(blob: bytes, title: str, subtitle: str) -> bytes:
+    """Copy of a rendered deck with the header title and subtitle replaced."""
+    prs = Presentation(io.BytesIO(blob))
+    spTree = prs.slides[0].shapes._spTree
+    for name, text in (("Title", title), ("Subtitle", subtitle)):
+        for t in spTree.xpath(f'./p:sp[p:nvSpPr/p:cNvPr/@name="{name}"]//a:t'):
+            t.text = text
+    buf = io.BytesIO()
+    prs.save(buf)
+    return buf.getvalue()
 
 
 # ═══════════════════════════════════════════════════════════
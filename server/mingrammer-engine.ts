@@ -1,7 +1,9 @@
 /**
  * Mingrammer Engine Bridge
  * 
- * Spawns the Python mingrammer engine as a child process.
+ * Keeps a small pool of warm Python engine workers (generate.py in
+ * ARCHGEN_WORKER mode, NDJSON over stdio) so requests don't pay interpreter
+ * start-up. ARCHGEN_WORKERS=0 falls back to one process per request.
  * The Python engine runs:
  *   1. Knowledge base decision engine (FREE, deterministic)
  *   2. AST-based blueprint slicer
@@ -10,11 +12,13 @@
  * Returns: decisions, anti-patterns, PNG path
  */
 
-import { spawn } from "child_process";
+import { spawn, type ChildProcessWithoutNullStreams } from "child_process";
 import path from "path";
 
 const ENGINE_DIR = path.join(process.cwd(), "server", "engine");
 const PYTHON = "python3";
+const ENGINE_TIMEOUT_MS = 60_000;
+const POOL_SIZE = Math.max(0, parseInt(process.env.ARCHGEN_WORKERS ?? "2", 10) || 0);
 
 export interface MingrammerResult {
   success: boolean;
@@ -27,26 +31,176 @@ export interface MingrammerResult {
   removed_count: number;
   png_path: string;
   png_filename: string;
+  png_pending?: boolean;  // PNG still rendering; <png_path minus .png>.done appears when ready
   python_source: string;
   diagram: any;  // Full Diagram JSON for editable canvas
   error?: string;
 }
 
+interface PendingRequest {
+  id: number;
+  line: string;  // NDJSON request, written when the request is dispatched
+  resolve: (result: MingrammerResult) => void;
+  reject: (err: Error) => void;
+  timer?: NodeJS.Timeout;
+}
+
+/**
+ * One long-lived `generate.py` process. The worker handles one request at a
+ * time, so requests wait here and are dispatched one by one; each carries an
+ * id that the worker echoes back, one JSON object per line each way.
+ */
+class EngineWorker {
+  private proc: ChildProcessWithoutNullStreams | null = null;
+  private buffer = "";
+  private nextId = 1;
+  private queue: PendingRequest[] = [];
+  private active: PendingRequest | null = null;
+
+  private start(): ChildProcessWithoutNullStreams {
+    const proc = spawn(PYTHON, [path.join(ENGINE_DIR, "generate.py")], {
+      cwd: ENGINE_DIR,
+      env: { ...process.env, PYTHONDONTWRITEBYTECODE: "1", ARCHGEN_WORKER: "1" },
+    });
+    // Decode as a stream so multi-byte characters split across chunks survive
+    proc.stdout.setEncoding("utf8");
+    proc.stdout.on("data", (chunk: string) => {
+      if (this.proc === proc) this.onData(chunk);
+    });
+    proc.stderr.on("data", (data: Buffer) => {
+      process.stderr.write(`[engine] ${data}`);
+    });
+    // Events from a process that was already replaced must not touch the new one
+    proc.on("exit", (code: number | null) => {
+      if (this.proc === proc) this.fail(new Error(`Engine worker exited (code ${code})`));
+    });
+    proc.on("error", (err: Error) => {
+      if (this.proc === proc) this.fail(new Error(`Failed to spawn Python engine: ${err.message}`));
+    });
+    proc.stdin.on("error", (err: Error) => {
+      if (this.proc === proc) this.fail(new Error(`Engine worker stdin closed: ${err.message}`));
+    });
+    this.proc = proc;
+    this.buffer = "";
+    return proc;
+  }
+
+  /** Send the next queued request once the worker is free; its timeout starts now. */
+  private dispatch() {
+    if (this.active || this.queue.length === 0) return;
+    const req = this.queue.shift()!;
+    this.active = req;
+    const proc = this.proc ?? this.start();
+    req.timer = setTimeout(() => {
+      // A stuck worker would block everything queued behind it: give up on
+      // this request only and restart the worker for the rest
+      this.fail(new Error(`Engine timeout (${ENGINE_TIMEOUT_MS / 1000}s)`));
+    }, ENGINE_TIMEOUT_MS);
+    proc.stdin.write(req.line);
+  }
+
+  private onData(chunk: string) {
+    this.buffer += chunk;
+    let nl: number;
+    while ((nl = this.buffer.indexOf("\n")) >= 0) {
+      const line = this.buffer.slice(0, nl);
+      this.buffer = this.buffer.slice(nl + 1);
+      if (!line.trim()) continue;
+
+      let result: MingrammerResult & { id?: number };
+      try {
+        result = JSON.parse(line);
+      } catch {
+        console.error(`[engine] Unparseable worker output: ${line.slice(0, 500)}`);
+        continue;
+      }
+      const req = this.active;
+      if (!req || result.id !== req.id) continue;
+      this.active = null;
+      clearTimeout(req.timer);
+      delete result.id;
+      if (!result.success) {
+        req.reject(new Error(result.error || "Engine returned failure"));
+      } else {
+        req.resolve(result);
+      }
+      this.dispatch();
+    }
+  }
+
+  /**
+   * Reject the request in flight and drop the process. Queued requests were
+   * never sent, so they go to a fresh process.
+   */
+  private fail(err: Error) {
+    const proc = this.proc;
+    this.proc = null;
+    if (proc && proc.exitCode === null) proc.kill("SIGTERM");
+    const req = this.active;
+    this.active = null;
+    if (req) {
+      clearTimeout(req.timer);
+      req.reject(err);
+    }
+    this.dispatch();
+  }
+
+  get load(): number {
+    return this.queue.length + (this.active ? 1 : 0);
+  }
+
+  request(prompt: string, outputDir: string, hiRes = false): Promise<MingrammerResult> {
+    return new Promise((resolve, reject) => {
+      const id = this.nextId++;
+      // The worker replies as soon as the canvas JSON is ready; the PNG follows
+      const line = JSON.stringify({ id, prompt, output_dir: outputDir, background_png: true, hi_res: hiRes }) + "\n";
+      this.queue.push({ id, line, resolve, reject });
+      this.dispatch();
+    });
+  }
+}
+
+const pool: EngineWorker[] = Array.from({ length: POOL_SIZE }, () => new EngineWorker());
+let nextWorker = 0;
+
 /**
  * Generate a mingrammer architecture diagram from a prompt.
  * 
  * @param prompt - User's architecture description
  * @param outputDir - Where to write the PNG
+ * @param hiRes - Render the PNG at 150 dpi instead of the 96 dpi preview
  * @returns MingrammerResult with decisions + PNG path
  */
 export async function generateDiagram(
   prompt: string,
-  outputDir: string
+  outputDir: string,
+  hiRes = false
+): Promise<MingrammerResult> {
+  if (pool.length === 0) {
+    return generateDiagramOnce(prompt, outputDir, hiRes);
+  }
+  // Round-robin, but skip past a busy worker when an idle one exists
+  let worker = pool[nextWorker++ % pool.length];
+  if (worker.load > 0) {
+    worker = pool.find((w) => w.load === 0) ?? worker;
+  }
+  return worker.request(prompt, outputDir, hiRes);
+}
+
+/**
+ * One-shot fallback: spawn a fresh engine process for a single prompt.
+ */
+function generateDiagramOnce(
+  prompt: string,
+  outputDir: string,
+  hiRes = false
 ): Promise<MingrammerResult> {
   return new Promise((resolve, reject) => {
     const generateScript = path.join(ENGINE_DIR, "generate.py");
 
-    const proc = spawn(PYTHON, [generateScript, prompt, outputDir], {
+    const args = [generateScript, prompt, outputDir];
+    if (hiRes) args.push("--hi-res");
+    const proc = spawn(PYTHON, args, {
       cwd: ENGINE_DIR,
       env: { ...process.env, PYTHONDONTWRITEBYTECODE: "1" },
     });
@@ -54,8 +208,9 @@ export async function generateDiagram(
     let stdout = "";
     let stderr = "";
 
-    proc.stdout.on("data", (data: Buffer) => {
-      stdout += data.toString();
+    proc.stdout.setEncoding("utf8");
+    proc.stdout.on("data", (data: string) => {
+      stdout += data;
     });
 
     proc.stderr.on("data", (data: Buffer) => {
@@ -89,11 +244,10 @@ export async function generateDiagram(
       reject(new Error(`Failed to spawn Python engine: ${err.message}`));
     });
 
-    // 60 second timeout
     setTimeout(() => {
       proc.kill("SIGTERM");
-      reject(new Error("Engine timeout (60s)"));
-    }, 60_000);
+      reject(new Error(`Engine timeout (${ENGINE_TIMEOUT_MS / 1000}s)`));
+    }, ENGINE_TIMEOUT_MS);
   });
 }
 
@@ -78,6 +78,12 @@ export async function registerRoutes(httpServer: Server, app: Express): Promise<
   // Serve generated diagram PNGs
   app.use("/api/diagrams/png", express.static(DIAGRAMS_DIR));
 
+  // PNG readiness for background renders (engine writes arch_<key>.done when finished)
+  app.get("/api/diagrams/png-status/:filename", (req, res) => {
+    const base = path.basename(req.params.filename).replace(/\.png$/, "");
+    res.json({ ready: fs.existsSync(path.join(DIAGRAMS_DIR, `${base}.done`)) });
+  });
+
   // GET engine health check
   app.get("/api/engine/status", async (_req, res) => {
     const status = await checkEngine();
@@ -103,7 +109,9 @@ export async function registerRoutes(httpServer: Server, app: Express): Promise<
 
       // Step 2: MINGRAMMER ENGINE — knowledge base + AST slicer + real cloud icons (FREE, PRIMARY)
       try {
-        const result = await generateDiagram(prompt, DIAGRAMS_DIR);
+        // ?hi=1 (or hi_res in the body) renders the 150 dpi PNG instead of the preview
+        const hiRes = req.query.hi === "1" || req.body.hi_res === true;
+        const result = await generateDiagram(prompt, DIAGRAMS_DIR, hiRes);
         const pngUrl = `/api/diagrams/png/${result.png_filename}`;
         const userId = req.user.claims.sub;
         
@@ -112,6 +120,7 @@ export async function registerRoutes(httpServer: Server, app: Express): Promise<
           subtitle: `${result.kept_count} products selected · ${result.removed_count} skipped · Real GCP icons`,
           source: "mingrammer",
           png_url: pngUrl,
+          png_pending: !!result.png_pending,
           decisions: result.decisions,
           anti_patterns: result.anti_patterns,
           kept: result.kept,